@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt
+from App.api.security import jwt_required
 
 from App.controllers import auth as auth_controller
 from App.controllers import user as user_controller
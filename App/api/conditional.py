@@ -0,0 +1,43 @@
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+
+from App.controllers.reference import reference_versions
+from App.models.reference_version import TABLE_COLUMNS
+from App.serialization import wants_columnar
+
+
+def conditional(*tables, private=False):
+    """
+    Conditional GET for list endpoints over reference tables ("area", "street", "item").
+    - strong ETag: the tables' version tokens plus the request's query string
+      and response shape (JSON or columnar, see App.serialization)
+    - If-None-Match answers 304 before the view runs: no rows read, nothing
+      serialized. No Last-Modified / If-Modified-Since: a date is one-second
+      granular and blind to the query string and shape, so it could serve stale 304s
+    - clients must revalidate (no-cache); private for per-user endpoints
+    Put it below the auth decorators so a 304 is never served unauthenticated.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def inner(*a, **k):
+            versions = reference_versions()
+            tokens = [versions[TABLE_COLUMNS[t]] or "" for t in tables]
+            shape = "columnar" if wants_columnar() else "json"
+            key = "|".join(tokens + [request.path, request.query_string.decode(), shape])
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            not_modified = bool(request.if_none_match) and request.if_none_match.contains(etag)
+
+            response = make_response(('', 304) if not_modified else fn(*a, **k))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                response.vary.add('Accept')
+                response.cache_control.no_cache = True
+                if private:
+                    response.cache_control.private = True
+                else:
+                    response.cache_control.public = True
+            return response
+        return inner
+    return wrapper
@@ -1,13 +1,26 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from App.controllers.identity import verify_jwt, authenticated_user, current_identity
+
+
+def jwt_required(optional=False, refresh=False):
+    """flask_jwt_extended's jwt_required, decoding the token once per request (verify_jwt)."""
+    def wrapper(fn):
+        @wraps(fn)
+        def inner(*a, **k):
+            verify_jwt(optional=optional, refresh=refresh)
+            return current_app.ensure_sync(fn)(*a, **k)
+        return inner
+    return wrapper
 
 
 def role_required(*roles):
     def wrapper(fn):
         @wraps(fn)
         def inner(*a, **k):
-            verify_jwt_in_request()
+            verify_jwt()
             claims = get_jwt()
             if roles and claims.get("role") not in roles:
                 return jsonify({"error": {"code": "forbidden", "message": "insufficient role"}}), 403
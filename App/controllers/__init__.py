@@ -18,16 +18,21 @@ from .resident import (
     resident_cancel_stop,
     resident_view_driver_stats,
     resident_view_stock,
-    resident_view_inbox
+    resident_view_inbox,
+    resident_inbox_page,
+    resident_unread_count,
+    resident_mark_read
 )
 
 from .driver import (
     driver_schedule_drive,
     driver_cancel_drive,
     driver_view_drives,
+    driver_drives_page,
     driver_start_drive,
     driver_end_drive,
     driver_view_requested_stops,
+    driver_requested_stops_by_drive,
     driver_update_stock,
     driver_view_stock
 )
@@ -43,7 +48,24 @@ from .admin import (
     admin_view_all_streets,
     admin_add_item,
     admin_delete_item,
-    admin_view_all_items
+    admin_view_all_items,
+    admin_items_page,
+    admin_dashboard_summary
+)
+
+from .notification import (
+    prune_notifications,
+    prune_stop_events,
+    notify_street,
+    notify_drive_event,
+    get_fanout_stats
+)
+
+from .outbox import (
+    queue_resident_notification,
+    queue_street_notification,
+    queue_drive_event,
+    drain_outbox
 )
 
 
@@ -55,15 +77,25 @@ __all__ = [
     # resident
     "resident_create", "resident_request_stop", "resident_cancel_stop",
     "resident_view_driver_stats", "resident_view_stock", "resident_view_inbox",
+    "resident_inbox_page", "resident_unread_count", "resident_mark_read",
 
     # driver
-    "driver_schedule_drive", "driver_cancel_drive", "driver_view_drives",
+    "driver_schedule_drive", "driver_cancel_drive", "driver_view_drives", "driver_drives_page",
     "driver_start_drive", "driver_end_drive", "driver_view_requested_stops",
-    "driver_update_stock", "driver_view_stock",
+    "driver_requested_stops_by_drive", "driver_update_stock", "driver_view_stock",
 
     # admin
     "admin_create_driver", "admin_delete_driver", "admin_add_area",
     "admin_delete_area", "admin_view_all_areas", "admin_add_street",
     "admin_delete_street", "admin_view_all_streets", "admin_add_item",
-    "admin_delete_item", "admin_view_all_items"
+    "admin_delete_item", "admin_view_all_items", "admin_items_page",
+    "admin_dashboard_summary",
+
+    # notification
+    "prune_notifications", "prune_stop_events", "notify_street",
+    "notify_drive_event", "get_fanout_stats",
+
+    # outbox
+    "queue_resident_notification", "queue_street_notification",
+    "queue_drive_event", "drain_outbox"
 ]
@@ -1,6 +1,9 @@
-from App.models import Admin, Driver, Area, Street, Item
+from App.models import Admin, Driver, Area, Street, Item, User, Drive, Stop
 from App.database import db
+from App.controllers.pagination import keyset_list
+from App.controllers.reference import cached_areas, cached_streets, cached_items
 from flask import current_app
+from sqlalchemy import func
 
 
 
@@ -105,10 +108,36 @@ def admin_delete_item(item_id):
     db.session.commit()
 
 def admin_view_all_areas():
-    return Area.query.all()
+    return cached_areas()
 
 def admin_view_all_streets():
-    return Street.query.all()
+    return cached_streets()
 
 def admin_view_all_items():
-     return Item.query.all()
+    return cached_items()
+
+def admin_items_page(cursor=None, limit=None, q=None, fields=None):
+    """Items by name, optionally those whose name contains q, keyset-paginated from the reference cache."""
+    items = cached_items()
+    if q:
+        items = [i for i in items if q.lower() in i.name.lower()]
+    return keyset_list(items, [Item.name, Item.id], cursor=cursor, limit=limit, fields=fields)
+
+def admin_dashboard_summary():
+    """
+    Row counts for the admin dashboard, in one round trip.
+    - drivers / residents are counted on the user table's type column, no joins
+    """
+    def count(column, *criteria):
+        return db.select(func.count(column)).where(*criteria).scalar_subquery()
+
+    row = db.session.execute(db.select(
+        count(Area.id).label('areas'),
+        count(Street.id).label('streets'),
+        count(Item.id).label('items'),
+        count(User.id, User.type == "Driver").label('drivers'),
+        count(User.id, User.type == "Resident").label('residents'),
+        count(Drive.id, Drive.status.in_(("Upcoming", "In Progress"))).label('activeDrives'),
+        count(Stop.id, Stop.status == "Pending").label('pendingStops')
+    )).one()
+    return dict(row._mapping)
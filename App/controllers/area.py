@@ -1,4 +1,13 @@
 from App.models import Area, Street
 from App.database import db
+from App.controllers.pagination import keyset_list
+from App.controllers.reference import cached_areas
 
 # All area-related business logic will be moved here as functions
+
+def areas_page(cursor=None, limit=None, q=None, fields=None):
+    """Areas by name, optionally those whose name contains q, keyset-paginated from the reference cache."""
+    areas = cached_areas()
+    if q:
+        areas = [a for a in areas if q.lower() in a.name.lower()]
+    return keyset_list(areas, [Area.name, Area.id], cursor=cursor, limit=limit, fields=fields)
@@ -1,10 +1,14 @@
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import create_access_token, jwt_required, JWTManager
 
-from App.models import User
+from App.models.loading import credentials, user_entity
+from App.controllers.identity import current_identity, user_snapshot
 from App.database import db
 
 def login(username, password):
-  user = User.query.filter_by(username=username).first()
+  entity = user_entity()
+  user = db.session.scalars(
+      db.select(entity).options(credentials(entity)).where(entity.username == username)
+  ).first()
   if user and user.check_password(password):
       claims = {"role": user.type}  
       token = create_access_token(identity=user.id, additional_claims=claims)
@@ -30,7 +34,7 @@ def setup_jwt(app):
       user_id = int(identity)
     except (TypeError, ValueError):
       return None
-    return db.session.get(User, user_id)
+    return user_snapshot(user_id, jwt_data.get("jti"))
 
   return jwt
 
@@ -39,14 +43,6 @@ def setup_jwt(app):
 def add_auth_context(app):
   @app.context_processor
   def inject_user():
-      try:
-          verify_jwt_in_request()
-          identity = get_jwt_identity()
-          user_id = int(identity) if identity is not None else None
-          current_user = db.session.get(User, user_id) if user_id is not None else None
-          is_authenticated = current_user is not None
-      except Exception as e:
-          print(e)
-          is_authenticated = False
-          current_user = None
-      return dict(is_authenticated=is_authenticated, current_user=current_user)
\ No newline at end of file
+      # the token the view already verified, and its cached UserSnapshot
+      current_user = current_identity()
+      return dict(is_authenticated=current_user is not None, current_user=current_user)
\ No newline at end of file
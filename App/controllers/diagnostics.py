@@ -0,0 +1,45 @@
+from sqlalchemy import text
+
+from App.models import Drive, Stop, DriverStock, Notification
+from App.database import db
+
+
+def hot_queries():
+    """
+    The query shapes on the request hot paths, with placeholder parameters.
+    Each one should be served by an index (see migration 1b7d5e3c9a40).
+    """
+    resident = db.metadata.tables['resident']
+    return [
+        ("resident dashboard: upcoming drives on a street",
+         db.select(Drive).where(Drive.areaId == 1, Drive.streetId == 1, Drive.status == "Upcoming")),
+        ("driver_start_drive / driver_end_drive: driver's drive by status",
+         db.select(Drive).where(Drive.driverId == 1, Drive.status == "In Progress")),
+        ("resident_request_stop: existing stop",
+         db.select(Stop).where(Stop.driveId == 1, Stop.residentId == 1)),
+        ("driver_update_stock: stock row",
+         db.select(DriverStock).where(DriverStock.driverId == 1, DriverStock.itemId == 1)),
+        ("street fan-out: residents on a street",
+         db.select(resident.c.id).where(resident.c.areaId == 1, resident.c.streetId == 1)),
+        ("/streets/<id>/drives: upcoming drives on a street by date",
+         db.select(Drive).where(Drive.streetId == 1, Drive.status == "Upcoming",
+                                Drive.date >= "2026-01-01", Drive.date <= "2026-01-15")
+         .order_by(Drive.date, Drive.time, Drive.id)),
+        ("resident inbox: newest notifications",
+         db.select(Notification).where(Notification.residentId == 1)
+         .order_by(Notification.createdAt.desc(), Notification.id.desc()).limit(20)),
+    ]
+
+
+def explain(stmt):
+    """Returns the database's plan for stmt as a list of lines."""
+    dialect = db.session.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+    return [row[0] for row in db.session.execute(text(f"EXPLAIN {sql}")).all()]
+
+
+def explain_hot_queries():
+    return [(name, explain(stmt)) for name, stmt in hot_queries()]
@@ -1,4 +1,94 @@
-from App.models import Drive, Street, Area
+import threading
+import time as clock
+from collections import namedtuple
+from datetime import date as Date, datetime, timedelta
+
+from flask import current_app
+
+from App.models import Drive
 from App.database import db
 
 # All drive-related business logic will be moved here as functions
+
+UPCOMING_HORIZON_DAYS = 14
+STREET_DRIVES_TTL = 30
+# app.extensions key: (street id, first day, last day) -> (expires, drives)
+STREET_DRIVES_CACHE = "street_drives"
+
+
+class DriveRef(namedtuple("DriveRef", "id driverId areaId streetId date time status")):
+    """Immutable snapshot of a drive, safe to share between requests."""
+    __slots__ = ()
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'driverId': self.driverId,
+            'areaId': self.areaId,
+            'streetId': self.streetId,
+            'date': self.date.strftime("%Y-%m-%d"),
+            'time': self.time.strftime("%H:%M:%S"),
+            'status': self.status
+        }
+
+
+_street_drives_lock = threading.Lock()
+
+
+def _parse_day(day):
+    if day is None or isinstance(day, Date):
+        return day
+    try:
+        return datetime.strptime(day, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("date must be in YYYY-MM-DD format.")
+
+
+def get_drives_for_street(street_id, date=None):
+    """
+    Upcoming drives on a street, soonest first, as DriveRef snapshots.
+    - date: only that day ("YYYY-MM-DD"); otherwise today through UPCOMING_HORIZON_DAYS ahead
+    One range scan of ix_drive_street_status_date, then served from a
+    per-app cache for STREET_DRIVES_TTL seconds (config; 0 disables it).
+    Scheduling, cancelling, starting or ending a drive clears the street's
+    entries in this worker (invalidate_street_drives).
+    """
+    day = _parse_day(date)
+    start = end = day
+    if day is None:
+        start = Date.today()
+        end = start + timedelta(days=UPCOMING_HORIZON_DAYS)
+
+    ttl = current_app.config.get('STREET_DRIVES_TTL', STREET_DRIVES_TTL)
+    cache = current_app.extensions.setdefault(STREET_DRIVES_CACHE, {})
+    key = (street_id, start, end)
+    now = clock.monotonic()
+    cached = cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    columns = [getattr(Drive, field) for field in DriveRef._fields]
+    rows = db.session.execute(
+        db.select(*columns)
+        .where(Drive.streetId == street_id, Drive.status == "Upcoming",
+               Drive.date >= start, Drive.date <= end)
+        .order_by(Drive.date, Drive.time, Drive.id)
+    ).all()
+    drives = tuple(DriveRef(*row) for row in rows)
+    if ttl:
+        with _street_drives_lock:
+            # drop expired entries so the cache stays as small as the streets in use
+            for stale in [k for k, (expires, _) in cache.items() if expires <= now]:
+                del cache[stale]
+            cache[key] = (now + ttl, drives)
+    return drives
+
+
+def invalidate_street_drives(street_id):
+    """Drops the cached schedules of street_id (in this worker)."""
+    cache = current_app.extensions.get(STREET_DRIVES_CACHE)
+    if not cache:
+        return
+    with _street_drives_lock:
+        for key in [k for k in cache if k[0] == street_id]:
+            del cache[key]
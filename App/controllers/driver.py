@@ -1,5 +1,11 @@
-from App.models import Driver, Drive, Street, Item, DriverStock, Resident, Stop
+from App.models import Driver, Drive, Street, Item, DriverStock, Resident, Stop, StopEvent
+from App.models.stop_event import STOP_STATUS
 from App.database import db
+from App.controllers.drive import invalidate_street_drives
+from App.controllers.outbox import queue_drive_event, queue_resident_notification
+from App.controllers.pagination import keyset_page
+from App.serialization import serializer_for
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 def driver_schedule_drive(driver, area_id, street_id, date_str, time_str):
@@ -24,27 +30,58 @@ def driver_schedule_drive(driver, area_id, street_id, date_str, time_str):
         date=date
     ).first()
 
-    new_drive = driver.schedule_drive(area_id, street_id, date_str, time_str)
-
-    residents = Resident.query.filter_by(
-        areaId=area_id,
-        streetId=street_id
-    ).all()
-
-    for r in residents:
-        r.receive_notif(
-            f"SCHEDULED>> Drive {new_drive.id} by Driver {driver.username} "
-            f"on {new_drive.date} at {new_drive.time}"
-        )
-
-    db.session.commit()
-    return new_drive
+    # The street fan-out runs in the notifications worker, not in this request;
+    # the outbox row commits together with the drive
+    drive = driver.schedule_drive(area_id, street_id, date_str, time_str, notify=queue_drive_event)
+    invalidate_street_drives(street_id)
+    return drive
 
 def driver_cancel_drive(driver, drive_id):
-    return driver.cancel_drive(drive_id)
+    drive = db.session.get(Drive, drive_id)
+    street_id = drive.streetId if drive else None
+    result = driver.cancel_drive(drive_id, notify=queue_drive_event)
+    if street_id is not None:
+        invalidate_street_drives(street_id)
+    return result
+
+ACTIVE_DRIVE_STATUSES = ("Upcoming", "In Progress")
+
+def _drive_criteria(driver, statuses, date_from, date_to):
+    criteria = [Drive.driverId == driver.id]
+    if statuses:
+        criteria.append(Drive.status.in_(statuses))
+    if date_from:
+        criteria.append(Drive.date >= date_from)
+    if date_to:
+        criteria.append(Drive.date <= date_to)
+    return criteria
+
+def driver_drives_page(driver, cursor=None, limit=None,
+                       statuses=ACTIVE_DRIVE_STATUSES, date_from=None, date_to=None, fields=None):
+    """
+    One page of the driver's drives, soonest first, filtered in SQL.
+    - statuses: drive statuses to include (None for all)
+    - date_from / date_to: inclusive date bounds
+    - fields: the drive JSON keys to select and list (all by default)
+    Keyset-paginated on (date, time, id); the page's total is a COUNT over the same
+    filters, served by the drive(driverId, status) index.
+    """
+    criteria = _drive_criteria(driver, statuses, date_from, date_to)
+    total = db.session.scalar(db.select(db.func.count(Drive.id)).where(*criteria))
+    order_by = [Drive.date, Drive.time, Drive.id]
+    drives = serializer_for(Drive).only(fields, keep=order_by)
+    return keyset_page(
+        drives.query().filter(*criteria), order_by,
+        cursor=cursor, limit=limit, total=total, serializer=drives
+    )
 
-def driver_view_drives(driver):
-    return [d for d in driver.view_drives() if d.status in ("Upcoming", "In Progress")]
+def driver_view_drives(driver, statuses=ACTIVE_DRIVE_STATUSES):
+    return (
+        Drive.query
+        .filter(*_drive_criteria(driver, statuses, None, None))
+        .order_by(Drive.date, Drive.time, Drive.id)
+        .all()
+    )
 
 def driver_start_drive(driver, drive_id):
     current_drive = Drive.query.filter_by(driverId=driver.id, status="In Progress").first()
@@ -53,13 +90,19 @@ def driver_start_drive(driver, drive_id):
     drive = Drive.query.filter_by(driverId=driver.id, id=drive_id, status="Upcoming").first()
     if not drive:
         raise ValueError("Drive not found or cannot be started.")
-    return driver.start_drive(drive_id)
+    street_id = drive.streetId
+    result = driver.start_drive(drive_id)
+    invalidate_street_drives(street_id)
+    return result
 
 def driver_end_drive(driver):
     current_drive = Drive.query.filter_by(driverId=driver.id, status="In Progress").first()
     if not current_drive:
         raise ValueError("No drive in progress.")
-    return driver.end_drive(current_drive.id)
+    street_id = current_drive.streetId
+    result = driver.end_drive(current_drive.id)
+    invalidate_street_drives(street_id)
+    return result
 
 def driver_view_requested_stops(driver, drive_id):
     stops = driver.view_requested_stops(drive_id)
@@ -67,6 +110,39 @@ def driver_view_requested_stops(driver, drive_id):
         return []
     return stops
 
+def driver_requested_stops_page(driver, drive_id, cursor=None, limit=None, fields=None):
+    stops = serializer_for(Stop).only(fields, keep=[Stop.id])
+    query = (
+        stops.query()
+        .join(Drive, Drive.id == Stop.driveId)
+        .filter(Stop.driveId == drive_id, Drive.driverId == driver.id)
+    )
+    return keyset_page(query, [Stop.id], cursor=cursor, limit=limit, serializer=stops)
+
+def driver_requested_stops_by_drive(driver, drive_ids):
+    """
+    Stops on several of the driver's drives, grouped by drive id.
+    One IN-list query for the stops and one selectin query for their residents
+    (with street and area), however many drives there are.
+    """
+    stops_by_drive = defaultdict(list)
+    if not drive_ids:
+        return stops_by_drive
+    stops = (
+        Stop.query
+        .join(Drive, Drive.id == Stop.driveId)
+        .filter(Stop.driveId.in_(drive_ids), Drive.driverId == driver.id)
+        .options(
+            db.selectinload(Stop.resident).joinedload(Resident.street),
+            db.selectinload(Stop.resident).joinedload(Resident.area)
+        )
+        .order_by(Stop.driveId, Stop.id)
+        .all()
+    )
+    for stop in stops:
+        stops_by_drive[stop.driveId].append(stop)
+    return stops_by_drive
+
 def driver_update_stock(driver, item_id, quantity):
     item =  Item.query.get(item_id)
     if not item:
@@ -99,11 +175,12 @@ def driver_approve_stop(driver, stop_id, eta=None, status_msg=None):
     if status_msg:
         stop.driver_status_msg = status_msg
 
-    resident = stop.resident
-    resident.receive_notif(
+    queue_resident_notification(
+        stop.residentId,
         f"APPROVED>> Your stop request for drive {drive.id} "
         f"has been approved. ETA: {stop.eta or 'N/A'}, Status: {stop.driver_status_msg or 'Subscribed'}"
     )
+    StopEvent.record(stop, STOP_STATUS, drive)
 
     db.session.commit()
     return stop
@@ -122,11 +199,29 @@ def driver_reject_stop(driver, stop_id, reason=None):
     if reason:
         stop.driver_status_msg = reason
 
-    resident = stop.resident
     txt_reason = f" Reason: {reason}" if reason else ""
-    resident.receive_notif(
+    queue_resident_notification(
+        stop.residentId,
         f"REJECTED>> Your stop request for drive {drive.id} was rejected.{txt_reason}"
     )
+    StopEvent.record(stop, STOP_STATUS, drive)
 
     db.session.commit()
-    return stop
\ No newline at end of file
+    return stop
+
+def driver_latest_stop_event_id(driver_id):
+    return db.session.execute(
+        db.select(db.func.max(StopEvent.id)).where(StopEvent.driverId == driver_id)
+    ).scalar() or 0
+
+def driver_stop_events_since(driver_id, last_id, limit=100):
+    """Stop events on the driver's drives newer than last_id, oldest first."""
+    return (
+        StopEvent.query
+        .options(db.selectinload(StopEvent.resident).options(
+            db.joinedload(Resident.street), db.joinedload(Resident.area)))
+        .filter(StopEvent.driverId == driver_id, StopEvent.id > last_id)
+        .order_by(StopEvent.id)
+        .limit(limit)
+        .all()
+    )
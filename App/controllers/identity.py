@@ -0,0 +1,201 @@
+"""
+The authenticated user, worked out once per request and, across requests,
+once per token.
+
+A dashboard request used to decode the JWT in jwt_required, again in
+role_required and again in the template context processor, and to load its
+user in the user_lookup_loader, the context processor and the view's
+get_user. Now every one of them goes through this module:
+
+- verify_jwt(): the token is decoded and checked once; the outcome (claims,
+  or the error) is kept for the rest of the request
+- current_identity(): the token's UserSnapshot (id, type, username, areaId,
+  streetId, status), which is all authorization and read-only endpoints
+  need. Each worker keeps the snapshots of recent tokens in a bounded LRU
+  (IDENTITY_CACHE_SIZE tokens, IDENTITY_CACHE_TTL seconds; 0 disables it),
+  so a repeat token costs no query at all. The LRU and its counters live on
+  the app (app.extensions), like the reference and schedule caches
+- authenticated_user(): the ORM user, for views that change it; loaded once
+  per request (user_for)
+The per-request memo lives on flask.g and, as with reference_versions, is
+tied to the request it was made in: g outlives the request when an app
+context was already pushed (CLI, tests).
+
+A committed change to a user (profile, status, deletion) and user_logout
+drop that user's cached tokens in this worker; other workers pick the change
+up within IDENTITY_CACHE_TTL.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_current_user, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException, NoAuthorizationError
+from jwt.exceptions import PyJWTError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from App.database import db
+from App.models import User
+from App.models.loading import load_user
+from App.serialization import serializer_for
+
+IDENTITY_MEMO = "_identity"
+IDENTITY_CACHE_TTL = 60
+IDENTITY_CACHE_SIZE = 4096
+IDENTITY_CACHE = "identity_cache"
+# session.info key: ids of the users changed in the open transaction
+STALE_USERS = "identity_stale_users"
+
+
+class UserSnapshot(namedtuple("UserSnapshot", "id type username areaId streetId status")):
+    """What authorization needs of a user; immutable, safe to share between requests."""
+    __slots__ = ()
+
+
+class TokenCache:
+    """One app's recent tokens: token id (jti) -> (expires, UserSnapshot), least recently used first."""
+
+    def __init__(self):
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter(hits=0, misses=0, evictions=0, invalidations=0)
+
+
+_create_lock = threading.Lock()
+
+
+def token_cache():
+    """The current app's TokenCache."""
+    cache = current_app.extensions.get(IDENTITY_CACHE)
+    if cache is None:
+        with _create_lock:
+            cache = current_app.extensions.setdefault(IDENTITY_CACHE, TokenCache())
+    return cache
+
+
+def _memo():
+    current = request._get_current_object()
+    memo = g.get(IDENTITY_MEMO)
+    if memo is None or memo['request'] is not current:
+        memo = {'request': current}
+        setattr(g, IDENTITY_MEMO, memo)
+    return memo
+
+
+def verify_jwt(optional=False, refresh=False):
+    """
+    verify_jwt_in_request, once per request: later calls return the same
+    (header, claims) or raise the same error again.
+    - optional: no token is not an error (an invalid one still is)
+    """
+    memo = _memo()
+    key = 'refresh' if refresh else 'access'
+    if key not in memo:
+        try:
+            memo[key] = (verify_jwt_in_request(refresh=refresh), None)
+        except Exception as e:  # no token, expired, bad signature, unknown user...
+            memo[key] = (None, e)
+    result, error = memo[key]
+    if error is None:
+        return result
+    if optional and isinstance(error, NoAuthorizationError):
+        # nothing to decode; lets flask_jwt_extended record the anonymous request
+        return verify_jwt_in_request(optional=True, refresh=refresh)
+    raise error
+
+
+def user_snapshot(user_id, token_id=None):
+    """
+    The UserSnapshot of user_id, None if there is no such user (the
+    user_lookup_loader's lookup). Served from the token cache when token_id
+    was seen recently; otherwise one projection query, no ORM objects.
+    """
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', IDENTITY_CACHE_TTL)
+    cache = token_cache()
+    now = time.monotonic()
+    if ttl and token_id is not None:
+        with cache.lock:
+            cached = cache.tokens.get(token_id)
+            if cached is not None and cached[0] > now and cached[1].id == user_id:
+                cache.tokens.move_to_end(token_id)
+                cache.stats["hits"] += 1
+                return cached[1]
+    cache.stats["misses"] += 1
+
+    users = serializer_for(User).only(list(UserSnapshot._fields))
+    row = db.session.execute(users.select().where(User.id == user_id)).first()
+    if row is None:
+        return None
+    snapshot = UserSnapshot(*users.values(row))
+    if ttl and token_id is not None:
+        size = current_app.config.get('IDENTITY_CACHE_SIZE', IDENTITY_CACHE_SIZE)
+        with cache.lock:
+            cache.tokens[token_id] = (now + ttl, snapshot)
+            cache.tokens.move_to_end(token_id)
+            while len(cache.tokens) > size:
+                cache.tokens.popitem(last=False)
+                cache.stats["evictions"] += 1
+    return snapshot
+
+
+def forget_user(user_id):
+    """Drops every cached token of user_id (in this worker)."""
+    cache = token_cache()
+    with cache.lock:
+        for token_id in [t for t, (_, snapshot) in cache.tokens.items() if snapshot.id == user_id]:
+            del cache.tokens[token_id]
+            cache.stats["invalidations"] += 1
+
+
+def clear_identity_cache():
+    cache = token_cache()
+    with cache.lock:
+        cache.tokens.clear()
+
+
+def user_for(user_id):
+    """load_user(user_id), once per request."""
+    memo = _memo()
+    if 'user' not in memo or memo['user_id'] != user_id:
+        memo['user_id'], memo['user'] = user_id, load_user(user_id)
+    return memo['user']
+
+
+def current_identity():
+    """The request's UserSnapshot, or None without a valid token."""
+    try:
+        verify_jwt()
+        return get_current_user()
+    except (JWTExtendedException, PyJWTError):  # no token, expired, bad signature, unknown user...
+        return None
+
+
+def authenticated_user():
+    """The ORM user the request's token belongs to, or None without a valid token."""
+    identity = current_identity()
+    return user_for(identity.id) if identity is not None else None
+
+
+# Users changed or deleted in a transaction lose their cached tokens once it commits
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_users(session, flush_context, instances):
+    changed = {obj.id for objs in (session.dirty, session.deleted) for obj in objs
+               if isinstance(obj, User) and obj.id is not None}
+    if changed:
+        session.info.setdefault(STALE_USERS, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_changed_users(session):
+    changed = session.info.pop(STALE_USERS, ())
+    if changed and has_app_context():
+        for user_id in changed:
+            forget_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop(STALE_USERS, None)
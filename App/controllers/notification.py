@@ -0,0 +1,105 @@
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, or_
+
+from App.models import Notification, StopEvent
+from App.models.notification import fanout_stats
+from App.models.resident import MAX_INBOX_SIZE
+from App.database import db
+
+
+def prune_notifications(keep=MAX_INBOX_SIZE, older_than_days=None):
+    """
+    Retention policy for the notification table.
+    - Keeps the newest `keep` notifications per resident (what the inbox shows).
+    - Optionally also drops anything older than `older_than_days`.
+    Runs as a single set-based DELETE and returns the number of rows removed.
+    """
+    ranked = db.select(
+        Notification.id,
+        func.row_number().over(
+            partition_by=Notification.residentId,
+            order_by=(Notification.createdAt.desc(), Notification.id.desc())
+        ).label("rn")
+    ).subquery()
+    condition = Notification.id.in_(
+        db.select(ranked.c.id).where(ranked.c.rn > keep)
+    )
+
+    if older_than_days is not None:
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        condition = or_(condition, Notification.createdAt < cutoff)
+
+    result = db.session.execute(db.delete(Notification).where(condition))
+
+    if result.rowcount:
+        # Pruned rows may have been unread; resync the maintained counters
+        resident = db.metadata.tables['resident']
+        unread = (
+            db.select(func.count(Notification.id))
+            .where(Notification.residentId == resident.c.id, Notification.readAt.is_(None))
+            .scalar_subquery()
+        )
+        db.session.execute(db.update(resident).values(unreadCount=unread))
+
+    db.session.commit()
+    return result.rowcount
+
+
+def prune_stop_events(older_than_days=7):
+    """Drops driver stop-feed events older than `older_than_days`; they only serve reconnecting streams."""
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    result = db.session.execute(db.delete(StopEvent).where(StopEvent.createdAt < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+def notify_street(area_id, street_id, message):
+    """
+    Bulk fan-out of one message to every resident on a street.
+    - Writes all notifications with a single INSERT ... SELECT in one transaction.
+    - Returns how many residents were reached and how long the write took.
+    """
+    started = time.perf_counter()
+    try:
+        count = Notification.insert_for_street(area_id, street_id, message)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    current_app.logger.info(
+        "notify_street area=%s street=%s residents=%s elapsed_ms=%s",
+        area_id, street_id, count, elapsed_ms
+    )
+    return {'residents': count, 'elapsed_ms': elapsed_ms}
+
+
+def notify_drive_event(drive, event):
+    """
+    Idempotent street fan-out for a drive event (see Notification.fan_out_drive_event).
+    Every entry point that announces a drive goes through here or the model method,
+    so each resident gets one notification per (drive, event) no matter how many
+    layers ask for it.
+    """
+    started = time.perf_counter()
+    try:
+        delivered, suppressed = Notification.fan_out_drive_event(drive, event)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    current_app.logger.info(
+        "notify_drive_event drive=%s event=%s residents=%s suppressed=%s elapsed_ms=%s",
+        drive.id, event, delivered, suppressed, elapsed_ms
+    )
+    return {'residents': delivered, 'suppressed': suppressed, 'elapsed_ms': elapsed_ms}
+
+
+def get_fanout_stats():
+    return dict(fanout_stats)
@@ -0,0 +1,148 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from App.models import OutboxMessage, Notification, Drive
+from App.database import db
+
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 300
+
+
+# Enqueueing (request side)
+##################################################################################
+
+def _enqueue(kind, payload):
+    """
+    Adds one outbox row to the caller's session; the caller's commit makes it durable
+    together with whatever else the request changed. With NOTIFICATION_OUTBOX turned
+    off the notification is written inline instead.
+    """
+    if not current_app.config.get("NOTIFICATION_OUTBOX", True):
+        _deliver(kind, payload)
+        return None
+    message = OutboxMessage(kind=kind, payload=payload)
+    db.session.add(message)
+    return message
+
+
+def queue_resident_notification(resident_id, message):
+    return _enqueue("resident", {"resident_id": resident_id, "message": message})
+
+
+def queue_street_notification(area_id, street_id, message):
+    return _enqueue("street", {"area_id": area_id, "street_id": street_id, "message": message})
+
+
+def queue_drive_event(drive, event):
+    return _enqueue("drive_event", {"drive_id": drive.id, "event": event})
+
+
+# Delivery (worker side)
+##################################################################################
+
+def _deliver(kind, payload):
+    if kind == "resident":
+        Notification.deliver(payload["resident_id"], payload["message"])
+    elif kind == "street":
+        Notification.insert_for_street(payload["area_id"], payload["street_id"], payload["message"])
+    elif kind == "drive_event":
+        drive = db.session.get(Drive, payload["drive_id"])
+        if not drive:
+            raise ValueError(f"Drive {payload['drive_id']} no longer exists.")
+        Notification.fan_out_drive_event(drive, payload["event"])
+    else:
+        raise ValueError(f"Unknown outbox message kind '{kind}'.")
+    db.session.flush()
+
+
+def _claimable(now):
+    lease_expired = now - timedelta(seconds=LEASE_SECONDS)
+    return or_(
+        and_(OutboxMessage.status == "Pending", OutboxMessage.availableAt <= now),
+        # rows held by a worker that died mid-batch
+        and_(OutboxMessage.status == "Processing", OutboxMessage.claimedAt < lease_expired)
+    )
+
+
+def claim_outbox_batch(worker_id, batch_size=100):
+    """
+    Claims up to batch_size deliverable rows for worker_id and commits the claim.
+    - Postgres: SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never block
+      on or double-claim the same rows.
+    - SQLite: a single UPDATE ... WHERE id IN (SELECT ...) stamped with the worker id;
+      SQLite's database write lock makes the claim atomic.
+    """
+    now = datetime.now()
+    claim = {"status": "Processing", "claimedBy": worker_id, "claimedAt": now}
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        ids = db.session.scalars(
+            db.select(OutboxMessage.id)
+            .where(_claimable(now))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if ids:
+            db.session.execute(
+                db.update(OutboxMessage).where(OutboxMessage.id.in_(ids)).values(**claim)
+            )
+    else:
+        candidates = (
+            db.select(OutboxMessage.id)
+            .where(_claimable(now))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+        )
+        db.session.execute(
+            db.update(OutboxMessage)
+            .where(OutboxMessage.id.in_(candidates), _claimable(now))
+            .values(**claim)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+    return db.session.scalars(
+        db.select(OutboxMessage)
+        .where(OutboxMessage.claimedBy == worker_id, OutboxMessage.status == "Processing")
+        .order_by(OutboxMessage.id)
+    ).all()
+
+
+def drain_outbox(batch_size=100, worker_id=None):
+    """
+    Claims one batch and delivers it. Each message runs in its own savepoint:
+    delivered rows are deleted, failures are retried with exponential backoff and
+    parked as "Failed" after MAX_ATTEMPTS. Returns (delivered, failed).
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    batch = claim_outbox_batch(worker_id, batch_size)
+
+    delivered = failed = 0
+    for message in batch:
+        try:
+            with db.session.begin_nested():
+                _deliver(message.kind, message.payload)
+                db.session.delete(message)
+            delivered += 1
+        except Exception as e:
+            message.attempts += 1
+            message.lastError = str(e)
+            message.claimedBy = None
+            message.claimedAt = None
+            if message.attempts >= MAX_ATTEMPTS:
+                message.status = "Failed"
+            else:
+                message.status = "Pending"
+                message.availableAt = datetime.now() + timedelta(seconds=2 ** message.attempts)
+            failed += 1
+            current_app.logger.warning(
+                "outbox message %s failed (attempt %s): %s", message.id, message.attempts, e
+            )
+    db.session.commit()
+    return delivered, failed
@@ -0,0 +1,224 @@
+import base64
+import binascii
+import bisect
+import json
+from datetime import date, datetime, time
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page:
+    """One page of a keyset-paginated listing, with opaque cursors to its neighbours."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, serializer=None, fields=None):
+        self.items = items
+        self.next = next_cursor
+        self.prev = prev_cursor
+        self.total = total
+        self.serializer = serializer
+        self.fields = fields
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_json(self, serialize=None):
+        serialize = serialize or (self.serializer.dump if self.serializer else _item_json)
+        items = [serialize(item) for item in self.items]
+        if self.fields:
+            items = [{name: item[name] for name in self.fields} for item in items]
+        return self._wrap({'items': items})
+
+    def get_columnar(self):
+        """
+        The page as {columns, rows}: the keys once, then one list of values per
+        item. Projection rows (a Serializer) and plain snapshots (_fields_json)
+        go straight from the tuple to the list; anything else through get_json.
+        """
+        if self.serializer is not None:
+            columns, rows = self.serializer.names, self.serializer.values_all(self.items)
+        elif self.items and _fields_json(self.items[0]):
+            columns = self.fields or list(self.items[0]._fields)
+            if self.fields:
+                rows = [[getattr(item, c) for c in columns] for item in self.items]
+            else:
+                rows = [list(item) for item in self.items]
+        else:
+            items = [_item_json(item) for item in self.items]
+            columns = self.fields or (list(items[0]) if items else [])
+            rows = [[item[c] for c in columns] for item in items]
+        return self._wrap({'columns': columns, 'rows': rows})
+
+    def _wrap(self, out):
+        out['next'] = self.next
+        out['prev'] = self.prev
+        if self.total is not None:
+            out['total'] = self.total
+        return out
+
+
+def _item_json(item):
+    # models have get_json(); column projections (App.models.loading) are plain rows
+    return item.get_json() if hasattr(item, 'get_json') else item._asdict()
+
+
+def _fields_json(item):
+    """Rows and snapshots whose JSON is just their fields, in order (AreaRef, ...)."""
+    return hasattr(item, '_fields') and (not hasattr(item, 'get_json') or getattr(item, 'FIELDS_JSON', False))
+
+
+def page_size(limit=None):
+    """Clamps a requested page size to 1..MAX_PAGE_SIZE (configurable on the app)."""
+    config = current_app.config if has_app_context() else {}
+    maximum = config.get('MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    if limit in (None, ''):
+        limit = config.get('DEFAULT_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer.")
+    return max(1, min(limit, maximum))
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _load(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(direction, key):
+    raw = json.dumps([direction] + [_dump(v) for v in key])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, columns):
+    """Returns (direction, key values) for a cursor over the given sort columns."""
+    try:
+        direction, *values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if direction not in ("n", "p") or len(values) != len(columns):
+            raise ValueError
+        return direction, [_load(column, v) for column, v in zip(columns, values)]
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _beyond(columns, key, forward):
+    """Row-value comparison (c1, c2, ...) > (k1, k2, ...) (or <), spelled out for every dialect."""
+    column, value = columns[0], key[0]
+    strictly = column > value if forward else column < value
+    if len(columns) == 1:
+        return strictly
+    return or_(strictly, and_(column == value, _beyond(columns[1:], key[1:], forward)))
+
+
+def keyset_page(query, order_by, cursor=None, limit=None, descending=False, total=None, serializer=None):
+    """
+    Keyset pagination of an ORM query.
+    - order_by: the sort columns; the last one must be unique (normally the id)
+    - cursor: a Page.next / Page.prev cursor from an earlier call
+    - descending: newest-first listings
+    - serializer: the Serializer the query projects (App.serialization); Page
+      uses it to turn the rows into JSON
+    Deep pages cost the same as the first: each page is one indexed range scan
+    of limit + 1 rows, never an OFFSET.
+    """
+    limit = page_size(limit)
+    direction, key = decode_cursor(cursor, order_by) if cursor else ("n", None)
+    backwards = direction == "p"
+    # walking forward in a descending listing means moving to smaller keys
+    forward = descending == backwards
+
+    if key is not None:
+        query = query.filter(_beyond(order_by, key, forward))
+    ordering = [c.asc() if forward else c.desc() for c in order_by]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    page = _page(rows, order_by, more, backwards, cursor, total)
+    page.serializer = serializer
+    return page
+
+
+def keyset_list(items, order_by, cursor=None, limit=None, total=None, fields=None):
+    """
+    keyset_page over an in-memory list already sorted ascending by order_by
+    (the reference data cache). Same cursors, same Page.
+    - fields: list only these keys of each item's JSON (?fields=)
+    """
+    limit = page_size(limit)
+    if fields and items:
+        known = _item_json(items[0])
+        unknown = [name for name in fields if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(known)}.")
+    direction, key = decode_cursor(cursor, order_by) if cursor else ("n", None)
+    backwards = direction == "p"
+    keys = [_key_of(item, order_by) for item in items]
+
+    if backwards:
+        end = bisect.bisect_left(keys, tuple(key))
+        rows, more = items[max(0, end - limit):end], end > limit
+    else:
+        start = bisect.bisect_right(keys, tuple(key)) if key is not None else 0
+        rows, more = items[start:start + limit], start + limit < len(items)
+    page = _page(list(rows), order_by, more, backwards, cursor, total)
+    page.fields = fields
+    return page
+
+
+def _key_of(row, order_by):
+    return tuple(getattr(row, c.key) for c in order_by)
+
+
+def _page(rows, order_by, more, backwards, cursor, total):
+    next_cursor = prev_cursor = None
+    if rows:
+        if more or backwards:
+            next_cursor = encode_cursor("n", _key_of(rows[-1], order_by))
+        if (more and backwards) or (cursor and not backwards):
+            prev_cursor = encode_cursor("p", _key_of(rows[0], order_by))
+    return Page(rows, next_cursor, prev_cursor, total)
+
+
+def search_filter(column, q):
+    """Case-insensitive substring match on column, with q's LIKE wildcards taken literally."""
+    q = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{q}%", escape="\\")
+
+
+def page_args(args):
+    """
+    The cursor / limit / fields query parameters of a list endpoint (the
+    inbox's older `after` still works). fields is a list of JSON keys, or None.
+    """
+    fields = [name.strip() for name in args.get('fields', '').split(',') if name.strip()]
+    return {'cursor': args.get('cursor') or args.get('after'), 'limit': args.get('limit'), 'fields': fields or None}
+
+
+def int_arg(args, name):
+    """An optional integer query parameter: None when absent, ValueError when not an integer."""
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer.")
@@ -0,0 +1,146 @@
+"""
+Process-wide cache of the reference data: areas, streets and items.
+
+They change a handful of times a year but are read on every dashboard, every
+/areas and /streets call and every CLI prompt. Each process keeps one snapshot
+per app, tagged with the ReferenceVersion it was loaded at:
+
+- the version row is read once per request (memoised on flask.g) or once per
+  call outside a request, so a write in any worker is seen by every other
+  worker on its next request
+- the snapshot lives on the app (app.extensions), so apps on other databases,
+  such as the test apps, never share one
+- any flush that touches an Area, Street or Item changes the version in the
+  same transaction (App.models.reference_version)
+- snapshots are immutable tuples, not ORM objects, so they are safe to share
+  between sessions and threads
+"""
+import threading
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context, has_request_context, request
+
+from App.database import db
+from App.models import Area, Street, Item, ReferenceVersion
+from App.models.reference_version import VERSION_MEMO
+
+REFERENCE_CACHE = "reference_data"
+
+
+class AreaRef(namedtuple("AreaRef", "id name")):
+    __slots__ = ()
+    FIELDS_JSON = True
+
+    def get_json(self):
+        return self._asdict()
+
+
+class StreetRef(namedtuple("StreetRef", "id name areaId")):
+    __slots__ = ()
+    FIELDS_JSON = True
+
+    def get_json(self):
+        return self._asdict()
+
+
+class ItemRef(namedtuple("ItemRef", "id name price description tags")):
+    __slots__ = ()
+    FIELDS_JSON = True
+
+    def get_json(self):
+        return self._asdict()
+
+
+class ReferenceData:
+    """One snapshot: areas and streets sorted by (name, id), items by (name, id)."""
+
+    def __init__(self, version, areas, streets, items):
+        self.version = version
+        self.areas = areas
+        self.streets = streets
+        self.items = items
+        self.areas_by_id = {a.id: a for a in areas}
+        self.streets_by_id = {s.id: s for s in streets}
+        self.streets_by_area = {}
+        for street in streets:
+            self.streets_by_area.setdefault(street.areaId, []).append(street)
+
+
+_lock = threading.Lock()
+stats = {'hits': 0, 'loads': 0}
+
+
+def reference_versions():
+    """The ReferenceVersion row as a dict, read once per request."""
+    if not has_request_context():
+        return ReferenceVersion.current()
+    # g outlives the request when an app context was already pushed (CLI, tests),
+    # so the memo is tied to the request it was read in
+    current = request._get_current_object()
+    memo = g.get(VERSION_MEMO)
+    if memo is None or memo[0] is not current:
+        memo = (current, ReferenceVersion.current())
+        setattr(g, VERSION_MEMO, memo)
+    return memo[1]
+
+
+def _current_version():
+    return reference_versions()['version']
+
+
+def _load(version):
+    def rows(model, ref):
+        columns = [getattr(model, field) for field in ref._fields]
+        result = db.session.execute(db.select(*columns)).all()
+        return tuple(sorted((ref(*row) for row in result), key=lambda r: (r.name, r.id)))
+
+    stats['loads'] += 1
+    return ReferenceData(version, rows(Area, AreaRef), rows(Street, StreetRef), rows(Item, ItemRef))
+
+
+def reference_data():
+    """The current snapshot, reloaded when the version row has moved on."""
+    # read the version before the rows: a write landing in between then only
+    # causes one extra reload, never a stale snapshot under the new version
+    version = _current_version()
+    cache = current_app.extensions
+    data = cache.get(REFERENCE_CACHE)
+    if data is not None and data.version == version:
+        stats['hits'] += 1
+        return data
+    with _lock:
+        data = cache.get(REFERENCE_CACHE)
+        if data is None or data.version != version:
+            data = cache[REFERENCE_CACHE] = _load(version)
+    return data
+
+
+def invalidate_reference_data():
+    """Drops this process's snapshot (the version row covers the other workers)."""
+    if has_app_context():
+        current_app.extensions.pop(REFERENCE_CACHE, None)
+    if has_request_context():
+        g.pop(VERSION_MEMO, None)
+
+
+def cached_areas():
+    return list(reference_data().areas)
+
+
+def cached_area(area_id):
+    return reference_data().areas_by_id.get(area_id)
+
+
+def cached_streets(area_id=None):
+    data = reference_data()
+    if area_id is None:
+        return list(data.streets)
+    return list(data.streets_by_area.get(area_id, ()))
+
+
+def cached_street(street_id):
+    return reference_data().streets_by_id.get(street_id)
+
+
+def cached_items():
+    return list(reference_data().items)
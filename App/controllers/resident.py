@@ -1,5 +1,15 @@
-from App.models import Resident, Stop, Drive, Area, Street, DriverStock
+from datetime import datetime
+
+from sqlalchemy import case
+
+from App.models import Resident, Stop, Drive, Area, Street, DriverStock, Notification, StopEvent
+from App.models.stop_event import STOP_CREATED, STOP_CANCELLED
 from App.database import db
+from App.controllers.outbox import queue_resident_notification
+from App.controllers.pagination import keyset_page
+from App.serialization import serializer_for
+
+MAX_INBOX_PAGE_SIZE = 100
 
 
 def resident_create(username, password, area_id, street_id, house_number):
@@ -34,6 +44,10 @@ def resident_request_stop(resident, drive_id):
         status="Pending"
     )
     db.session.add(stop)
+    db.session.flush()
+    StopEvent.record(stop, STOP_CREATED, drive)
+    # Requesting a stop also subscribes the resident to updates for the drive
+    drive.registerObserver(resident)
 
     
     if hasattr(resident, "receive_notif"):
@@ -41,7 +55,8 @@ def resident_request_stop(resident, drive_id):
             drive.time.strftime('%H:%M')
             if getattr(drive, "time", None) is not None else ""
         )
-        resident.receive_notif(
+        queue_resident_notification(
+            resident.id,
             f"You requested a stop on drive #{drive.id} to "
             f"{drive.street.name}, {drive.area.name} at {time_part}."
         )
@@ -79,12 +94,16 @@ def resident_cancel_stop(resident, drive_id):
             drive.time.strftime('%H:%M')
             if drive and getattr(drive, "time", None) is not None else ""
         )
-        resident.receive_notif(
+        queue_resident_notification(
+            resident.id,
             f"You cancelled your stop request for drive #{drive.id} "
             f"to {drive.street.name}, {drive.area.name} at {time_part}."
         )
 
-   
+    if drive:
+        StopEvent.record(stop, STOP_CANCELLED, drive)
+        drive.removeObserver(resident)
+
     resident.cancel_stop(stop.id)
 
     
@@ -95,6 +114,72 @@ def resident_cancel_stop(resident, drive_id):
 def resident_view_inbox(resident):
     return resident.view_inbox()
 
+def resident_view_inbox_with_last_id(resident):
+    """
+    The inbox as resident_view_inbox shows it, and the newest notification id in
+    it: the live stream resumes from there, so nothing written after the read is missed.
+    """
+    notifications = resident.recent_notifications()
+    return [str(n) for n in notifications], max((n.id for n in notifications), default=0)
+
+def resident_inbox_page(resident_id, cursor=None, limit=None, fields=None):
+    """
+    Newest-first page of a resident's notifications, keyset-paginated on
+    (createdAt, id) so deep pages cost the same as the first one.
+    """
+    order_by = [Notification.createdAt, Notification.id]
+    notifications = serializer_for(Notification).only(fields, keep=order_by)
+    return keyset_page(
+        notifications.query().filter(Notification.residentId == resident_id), order_by,
+        cursor=cursor, limit=limit, descending=True, serializer=notifications
+    )
+
+def resident_latest_notification_id(resident_id):
+    return db.session.execute(
+        db.select(db.func.max(Notification.id)).where(Notification.residentId == resident_id)
+    ).scalar() or 0
+
+def resident_notifications_since(resident_id, last_id, limit=MAX_INBOX_PAGE_SIZE):
+    """Notifications newer than last_id, oldest first (the order a live stream replays them)."""
+    return (
+        Notification.query
+        .filter(Notification.residentId == resident_id, Notification.id > last_id)
+        .order_by(Notification.id)
+        .limit(limit)
+        .all()
+    )
+
+def resident_unread_count(resident_id):
+    # Reads the maintained counter; never counts notification rows
+    resident = db.metadata.tables['resident']
+    count = db.session.execute(
+        db.select(resident.c.unreadCount).where(resident.c.id == resident_id)
+    ).scalar()
+    return count or 0
+
+def resident_mark_read(resident_id, notification_ids=None):
+    """Marks the given notifications (or all of them) read and returns how many changed."""
+    stmt = db.update(Notification).where(
+        Notification.residentId == resident_id,
+        Notification.readAt.is_(None)
+    )
+    if notification_ids is not None:
+        stmt = stmt.where(Notification.id.in_(notification_ids))
+    marked = db.session.execute(stmt.values(readAt=datetime.now())).rowcount
+
+    if marked:
+        resident = db.metadata.tables['resident']
+        db.session.execute(
+            db.update(resident)
+            .where(resident.c.id == resident_id)
+            .values(unreadCount=case(
+                (resident.c.unreadCount > marked, resident.c.unreadCount - marked),
+                else_=0
+            ))
+        )
+    db.session.commit()
+    return marked
+
 def resident_view_driver_stats(resident, driver_id):
     driver = resident.view_driver_stats(driver_id)
     if not driver:
@@ -1,4 +1,21 @@
 from App.models import Street, Area
 from App.database import db
+from App.controllers.pagination import keyset_list
+from App.controllers.reference import cached_streets
 
 # All street-related business logic will be moved here as functions
+
+def get_streets_for_area(area_id):
+    """An area's streets by name, from the reference cache's area -> streets index."""
+    return cached_streets(area_id)
+
+def streets_page(area_id=None, cursor=None, limit=None, q=None, fields=None):
+    """
+    Streets by name, keyset-paginated from the reference cache.
+    - area_id: only that area's streets
+    - q: only names containing q
+    """
+    streets = get_streets_for_area(area_id) if area_id is not None else cached_streets()
+    if q:
+        streets = [s for s in streets if q.lower() in s.name.lower()]
+    return keyset_list(streets, [Street.name, Street.id], cursor=cursor, limit=limit, fields=fields)
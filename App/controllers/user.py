@@ -1,5 +1,9 @@
 from App.models import User, Driver
 from App.database import db
+from App.models.loading import credentials, user_entity, load_user
+from App.controllers.pagination import keyset_page, search_filter
+from App.serialization import serializer_for
+from App.controllers.identity import forget_user
 
 def create_user(username, password):
     newuser = User(username=username, password=password)
@@ -12,12 +16,35 @@ def get_user_by_username(username):
     return result.scalar_one_or_none()
 
 def get_user(id):
-    return db.session.get(User, id)
+    return load_user(id)
 
 def get_all_users():
-    return db.session.scalars(db.select(User)).all()
+    return db.session.scalars(db.select(user_entity())).all()
 
-def get_all_users_json():
+def get_users_page(role=None, cursor=None, limit=None, q=None, fields=None):
+    """
+    Users by id, keyset-paginated, as rows of the User serializer's columns.
+    - role: only "Admin", "Driver" or "Resident" accounts
+    - q: only usernames containing q
+    - fields: the keys to list, (id, username, type) by default; subtype
+      columns (status, areaId, streetId, houseNumber) join their tables
+    """
+    users = serializer_for(User).only(fields, keep=[User.id])
+    query = users.query()
+    if role:
+        query = query.filter(User.type == role)
+    if q:
+        query = query.filter(search_filter(User.username, q))
+    return keyset_page(query, [User.id], cursor=cursor, limit=limit, serializer=users)
+
+def get_all_users_json(fields=None):
+    """
+    Every user's get_json(), or with fields only those keys, selected as
+    columns (a resident's inbox is never loaded).
+    """
+    if fields:
+        users = serializer_for(User).only(fields)
+        return users.dump_all(db.session.execute(users.select().order_by(User.id)).all())
     users = get_all_users()
     if not users:
         return []
@@ -34,7 +61,10 @@ def update_user(id, username):
     return None
 
 def user_login(username, password):
-    user = db.session.execute(db.select(User).filter_by(username=username)).scalar_one_or_none()
+    entity = user_entity()
+    user = db.session.execute(
+        db.select(entity).options(credentials(entity)).where(entity.username == username)
+    ).scalar_one_or_none()
     if user and user.check_password(password):
         user.logged_in = True
         if isinstance(user, Driver):
@@ -48,6 +78,8 @@ def user_logout(user):
     if isinstance(user, Driver):
         user.status = "Offline"
     db.session.commit()
+    # even with nothing to write, the worker forgets the user's tokens
+    forget_user(user.id)
     return user
 
 def user_view_street_drives(user, area_id, street_id):
@@ -1,2 +1,12 @@
 SQLALCHEMY_DATABASE_URI="sqlite:///temp-database.db"
-SECRET_KEY="secret key"
\ No newline at end of file
+SECRET_KEY="secret key"
+NOTIFICATION_OUTBOX=True
+STREAM_HEARTBEAT=15
+STREAM_TIMEOUT=300
+DEFAULT_PAGE_SIZE=20
+MAX_PAGE_SIZE=100
+USER_POLYMORPHIC_LOADING="with_polymorphic"
+STREET_DRIVES_TTL=30
+FAST_JSON=True
+IDENTITY_CACHE_TTL=60
+IDENTITY_CACHE_SIZE=4096
@@ -0,0 +1,230 @@
+"""
+Benchmarks behind the `flask db-bench-*` CLI commands (wsgi.py). Each one builds
+its own scratch in-memory SQLite database; the application database is never
+touched. Not imported by the app itself.
+"""
+import functools
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import StaticPool
+from werkzeug.security import generate_password_hash
+
+from App.models import Drive, Notification, User, Resident
+from App.models.loading import credentials, polymorphic_user, resident_listing
+from App.database import db
+from App.serialization import orjson, serializer_for
+
+
+def benchmark_resident_listing(residents=10000, repeat=3):
+    """
+    Lists `residents` residents from a scratch in-memory SQLite database under
+    each loading profile. Returns (profile, best seconds, peak MB) tuples; the
+    application database is not touched.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    tables = db.metadata.tables
+    password = generate_password_hash("benchmark")
+    with engine.begin() as conn:
+        conn.execute(tables['area'].insert(), [{'id': 1, 'name': "Area"}])
+        conn.execute(tables['street'].insert(), [{'id': 1, 'name': "Street", 'areaId': 1}])
+        conn.execute(tables['user'].insert(), [
+            {'id': i, 'username': f"resident{i}", 'password': password, 'logged_in': False, 'type': "Resident"}
+            for i in range(1, residents + 1)
+        ])
+        conn.execute(tables['resident'].insert(), [
+            {'id': i, 'areaId': 1, 'streetId': 1, 'houseNumber': i, 'unreadCount': 0}
+            for i in range(1, residents + 1)
+        ])
+
+    profiles = [
+        ("Resident, every column", db.select(Resident).options(credentials())),
+        ("Resident, password deferred", db.select(Resident)),
+        ("resident_listing() rows", db.select(*resident_listing())),
+    ]
+    results = []
+    for name, stmt in profiles:
+        best = peak = None
+        # best of `repeat`: the first run also pays for compiling the statement.
+        # Timed and traced separately, as tracing slows the run down.
+        for _ in range(repeat):
+            with Session(engine) as session:
+                started = time.perf_counter()
+                session.execute(stmt).all()
+                elapsed = time.perf_counter() - started
+            with Session(engine) as session:
+                tracemalloc.start()
+                session.execute(stmt).all()
+                used = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            best = elapsed if best is None else min(best, elapsed)
+            peak = used if peak is None else min(peak, used)
+        results.append((name, round(best, 3), round(peak / 2 ** 20, 1)))
+    engine.dispose()
+    return results
+
+
+@functools.cache
+def _single_table_user():
+    """The User hierarchy mapped single-table: one user table carrying every subtype's columns."""
+    class Base(DeclarativeBase):
+        pass
+
+    class SingleTableUser(Base):
+        __tablename__ = "user"
+        id = db.Column(db.Integer, primary_key=True)
+        username = db.Column(db.String(20), nullable=False, unique=True)
+        password = db.deferred(db.Column(db.String(256), nullable=False))
+        logged_in = db.Column(db.Boolean, nullable=False, default=False)
+        type = db.Column(db.String(50))
+        status = db.Column(db.String(20))
+        areaId = db.Column(db.Integer)
+        streetId = db.Column(db.Integer)
+        houseNumber = db.Column(db.Integer)
+        unreadCount = db.Column(db.Integer)
+        __mapper_args__ = {"polymorphic_on": type, "polymorphic_identity": "user"}
+
+    for name in ("Admin", "Driver", "Resident"):
+        type(name, (SingleTableUser,), {"__mapper_args__": {"polymorphic_identity": name}})
+    return SingleTableUser
+
+
+# Subtype column each hot path reads once the user is loaded (driver status, resident street)
+_SUBTYPE_COLUMN = {"Admin": None, "Driver": "status", "Resident": "streetId"}
+
+
+def benchmark_user_inheritance(users=5000, lookups=2000):
+    """
+    Times the identity lookup (the JWT user_lookup_loader: a user by id) and
+    login (by username, then the password hash) over three layouts of the
+    User hierarchy, each in a scratch in-memory SQLite database:
+    - joined: the current tables, loading User then each subtype on access
+    - with_polymorphic: the current tables, one LEFT OUTER JOIN query
+    - single table: every subtype column on the user table
+    Every lookup uses a fresh session, as a request would. Returns
+    (layout, path, microseconds per lookup, queries per lookup) tuples.
+    """
+    kinds = ["Admin"] * (users // 100) + ["Driver"] * (users // 10)
+    kinds += ["Resident"] * (users - len(kinds))
+    password = generate_password_hash("benchmark")
+    rows = [
+        {'id': i, 'username': f"user{i}", 'password': password, 'logged_in': False, 'type': kind}
+        for i, kind in enumerate(kinds, start=1)
+    ]
+    subtype = {
+        "Admin": lambda i: {'id': i},
+        "Driver": lambda i: {'id': i, 'status': "Available", 'areaId': 1, 'streetId': 1},
+        "Resident": lambda i: {'id': i, 'areaId': 1, 'streetId': 1, 'houseNumber': i, 'unreadCount': 0},
+    }
+
+    joined = create_engine("sqlite://", poolclass=StaticPool)
+    db.metadata.create_all(joined)
+    with joined.begin() as conn:
+        conn.execute(db.metadata.tables['user'].insert(), rows)
+        for kind, values in subtype.items():
+            conn.execute(db.metadata.tables[kind.lower()].insert(),
+                         [values(row['id']) for row in rows if row['type'] == kind])
+
+    SingleTableUser = _single_table_user()
+    single = create_engine("sqlite://", poolclass=StaticPool)
+    SingleTableUser.metadata.create_all(single)
+    with single.begin() as conn:
+        conn.execute(SingleTableUser.__table__.insert(),
+                     [dict(row, **subtype[row['type']](row['id'])) for row in rows])
+
+    layouts = [("joined", joined, User), ("with_polymorphic", joined, polymorphic_user),
+               ("single table", single, SingleTableUser)]
+    sample = random.Random(0).sample(range(1, users + 1), min(lookups, users))
+    results = []
+    for layout, engine, entity in layouts:
+        def by_id(session, user_id):
+            if entity is User or entity is SingleTableUser:
+                return session.get(entity, user_id)
+            return session.scalars(db.select(entity).where(entity.id == user_id)).one()
+
+        def by_name(session, user_id):
+            user = session.scalars(
+                db.select(entity).options(db.undefer(entity.password))
+                .where(entity.username == f"user{user_id}")
+            ).one()
+            user.password
+            return user
+
+        for path, load in (("identity lookup", by_id), ("login", by_name)):
+            queries = []
+            listener = lambda *args: queries.append(1)
+            event.listen(engine, "before_cursor_execute", listener)
+            started = time.perf_counter()
+            for user_id in sample:
+                with Session(engine) as session:
+                    user = load(session, user_id)
+                    column = _SUBTYPE_COLUMN[user.type]
+                    if column:
+                        getattr(user, column)
+            elapsed = time.perf_counter() - started
+            event.remove(engine, "before_cursor_execute", listener)
+            results.append((layout, path, round(elapsed / len(sample) * 1e6), round(len(queries) / len(sample), 2)))
+    joined.dispose()
+    single.dispose()
+    return results
+
+
+def benchmark_serialization(rows=10000, repeat=3):
+    """
+    Serializes `rows` drives and `rows` notifications from a scratch in-memory
+    SQLite database to a JSON body, the way the list endpoints used to
+    (ORM objects, get_json, json.dumps) and the way they do now (column
+    projection, Serializer.dump, and orjson when installed). Returns
+    (model, path, objects per second) tuples, best of `repeat`.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    tables = db.metadata.tables
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(tables['drive'].insert(), [
+            {'id': i, 'driverId': 1, 'areaId': 1, 'streetId': 1, 'date': now.date(),
+             'time': now.time().replace(microsecond=0), 'status': "Upcoming"}
+            for i in range(1, rows + 1)
+        ])
+        conn.execute(tables['notification'].insert(), [
+            {'id': i, 'residentId': 1, 'message': f"Drive {i} is on its way", 'createdAt': now}
+            for i in range(1, rows + 1)
+        ])
+
+    def stdlib(obj):
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+    encoders = [("json", stdlib)]
+    if orjson is not None:
+        encoders.append(("orjson", lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)))
+
+    results = []
+    for model in (Drive, Notification):
+        serializer = serializer_for(model)
+
+        def objects(session, encode):
+            return encode([item.get_json() for item in session.scalars(db.select(model)).all()])
+
+        def projection(session, encode):
+            return encode(serializer.dump_all(session.execute(serializer.select()).all()))
+
+        paths = [("ORM objects + get_json + json", objects, stdlib)]
+        paths += [(f"projection + Serializer + {name}", projection, encode) for name, encode in encoders]
+        for path, build, encode in paths:
+            best = None
+            for _ in range(repeat):
+                with Session(engine) as session:
+                    started = time.perf_counter()
+                    build(session, encode)
+                    elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results.append((model.__name__, path, round(rows / best)))
+    engine.dispose()
+    return results
@@ -5,6 +5,8 @@ from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
 from flask_cors import CORS
 
 from App.database import init_db
+from App.realtime import init_realtime
+from App.serialization import JSONProvider
 from App.config import load_config
 
 from App.controllers import (
@@ -25,6 +27,7 @@ def add_views(app):
 
 def create_app(overrides={}):
     app = Flask(__name__, static_url_path='/static')
+    app.json = JSONProvider(app)
 
     
     load_config(app, overrides)
@@ -38,6 +41,7 @@ def create_app(overrides={}):
     
     add_views(app)
     init_db(app)
+    init_realtime(app)
     jwt = setup_jwt(app)
     setup_admin(app)
     register_error_handlers(app)
@@ -9,3 +9,8 @@ from .area import Area
 from .street import Street
 from .item import Item
 from .driver_stock import DriverStock
+from .notification import Notification
+from .outbox import OutboxMessage
+from .stop_event import StopEvent
+from .drive_subscription import DriveSubscription
+from .reference_version import ReferenceVersion
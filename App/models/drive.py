@@ -1,6 +1,14 @@
 from App.database import db
+from .drive_subscription import DriveSubscription
+from .notification import Notification, observer_message
 
 class Drive(db.Model):
+    __table_args__ = (
+        db.Index("ix_drive_area_street_status", "areaId", "streetId", "status"),
+        db.Index("ix_drive_driver_status", "driverId", "status"),
+        db.Index("ix_drive_street_status_date", "streetId", "status", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     driverId = db.Column(db.Integer, db.ForeignKey('driver.id'), nullable=False)
     areaId = db.Column(db.Integer, db.ForeignKey('area.id'), nullable=False)
@@ -38,25 +46,33 @@ class Drive(db.Model):
         }
     
     def registerObserver(self, resident):
-        if not hasattr(self, "_observers"):
-            self._observers = []
-
-        if resident not in self._observers:
-            self._observers.append(resident)
+        """Persists the subscription (no commit); shared by every worker and request."""
+        if resident.id is None:
+            db.session.add(resident)
+            db.session.flush()
+        return DriveSubscription.add(self.id, resident.id)
 
     def removeObserver(self, resident):
-        if not hasattr(self, "_observers"):
-            return 
+        if resident.id is None:
+            return False
+        return DriveSubscription.remove(self.id, resident.id)
 
-        if resident in self._observers:
-            self._observers.remove(resident)
+    def observers(self):
+        from .resident import Resident
+        return (
+            Resident.query
+            .join(DriveSubscription, DriveSubscription.residentId == Resident.id)
+            .filter(DriveSubscription.driveId == self.id)
+            .all()
+        )
 
     def notifyObservers(self, payload):
-       
-        if not hasattr(self, "_observers"):
-            return 
-
-        for observer in self._observers:
-            update_method = getattr(observer, "update", None)
-            if callable(update_method):
-                update_method(payload)
\ No newline at end of file
+        """
+        Bulk update of every subscriber: one indexed INSERT ... SELECT over
+        drive_subscription instead of a Python loop over resident.update().
+        Commits; returns the number of notifications written.
+        """
+        payload = dict(payload, drive_id=payload.get("drive_id", self.id))
+        written = Notification.insert_for_subscribers(self.id, observer_message(payload))
+        db.session.commit()
+        return written
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from App.database import db
+
+
+class DriveSubscription(db.Model):
+    """Residents observing a drive. Backs Drive.registerObserver / Resident.subscribe."""
+    __tablename__ = "drive_subscription"
+    __table_args__ = (
+        # leads on driveId: notifyObservers resolves a drive's subscribers from this index
+        db.Index("uq_drive_subscription_drive_resident", "driveId", "residentId", unique=True),
+        db.Index("ix_drive_subscription_resident", "residentId"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    driveId = db.Column(db.Integer, db.ForeignKey('drive.id'), nullable=False)
+    residentId = db.Column(db.Integer, db.ForeignKey('resident.id'), nullable=False)
+    createdAt = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __init__(self, driveId, residentId):
+        self.driveId = driveId
+        self.residentId = residentId
+        self.createdAt = datetime.now()
+
+    @classmethod
+    def add(cls, driveId, residentId):
+        """Subscribes the resident (no commit). Returns True if they were not subscribed yet."""
+        values = {'driveId': driveId, 'residentId': residentId, 'createdAt': datetime.now()}
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(cls).values(**values).on_conflict_do_nothing(
+                index_elements=['driveId', 'residentId']
+            )
+            return db.session.execute(stmt).rowcount > 0
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(cls).values(**values))
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def remove(cls, driveId, residentId):
+        """Unsubscribes the resident (no commit). Returns True if a subscription was removed."""
+        result = db.session.execute(
+            db.delete(cls).where(cls.driveId == driveId, cls.residentId == residentId)
+        )
+        return result.rowcount > 0
+
+    @classmethod
+    def subscriber_ids(cls, driveId):
+        return db.session.scalars(
+            db.select(cls.residentId).where(cls.driveId == driveId).order_by(cls.residentId)
+        ).all()
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'driveId': self.driveId,
+            'residentId': self.residentId,
+            'createdAt': self.createdAt.strftime("%Y-%m-%d %H:%M:%S") if self.createdAt else None
+        }
@@ -3,6 +3,7 @@ from datetime import datetime
 from .user import User
 from .drive import Drive
 from .street import Street
+from .notification import Notification, DRIVE_SCHEDULED, DRIVE_CANCELLED
 
 
 class Driver(User):
@@ -47,7 +48,11 @@ class Driver(User):
         self.status = "Offline"
         db.session.commit()
 
-    def schedule_drive(self, areaId, streetId, date_str, time_str):
+    def schedule_drive(self, areaId, streetId, date_str, time_str, notify=Notification.fan_out_drive_event):
+        """
+        notify(drive, event) records the drive event in the drive's own transaction:
+        fanned out inline by default, queued on the outbox by the controllers.
+        """
         try:
             date = datetime.strptime(date_str, "%Y-%m-%d").date()
             time = datetime.strptime(time_str, "%H:%M").time()
@@ -64,32 +69,19 @@ class Driver(User):
                           time=time,
                           status="Upcoming")
         db.session.add(new_drive)
+        db.session.flush()
+        if notify:
+            notify(new_drive, DRIVE_SCHEDULED)
         db.session.commit()
-
-        street = Street.query.get(streetId)
-        if street:
-            for resident in street.residents:
-                resident.receive_notif(
-                    f"SCHEDULED>> Drive {new_drive.id} by Driver {self.id} on {date} at {time}"
-                )
-            db.session.commit()
         return (new_drive)
 
-    def cancel_drive(self, driveId):
+    def cancel_drive(self, driveId, notify=Notification.fan_out_drive_event):
         drive = Drive.query.get(driveId)
         if drive:
             drive.status = "Cancelled"
+            if notify:
+                notify(drive, DRIVE_CANCELLED)
             db.session.commit()
-
-            street = None
-            if self.streetId is not None:
-                street = Street.query.get(self.streetId)
-            if street:
-                for resident in street.residents:
-                    resident.receive_notif(
-                        f"CANCELLED: Drive {drive.id} by {self.id} on {drive.date} at {drive.time}"
-                    )
-                db.session.commit()
         return None
 
     def view_drives(self):
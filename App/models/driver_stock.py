@@ -1,6 +1,10 @@
 from App.database import db
 
 class DriverStock(db.Model):
+  __table_args__ = (
+      db.Index("ix_driver_stock_driver_item", "driverId", "itemId"),
+  )
+
   id = db.Column(db.Integer, primary_key=True)
   driverId = db.Column(db.Integer, db.ForeignKey('driver.id'), nullable=False)
   itemId = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
@@ -0,0 +1,62 @@
+"""
+Loading profiles: what each use case reads when it loads users.
+
+User.password is deferred, so a plain load (the JWT user lookup, get_user,
+relationship loads) never fetches the hash. Use cases that need more or less
+than the default pick a profile:
+
+- user_entity() / load_user(): any user by id or name, subtype columns
+  included, per the USER_POLYMORPHIC_LOADING setting
+- credentials(): logging in, where the hash is checked straight away
+- resident_listing(): a column projection returning plain rows, not
+  entities; `flask db-bench-loading` shows it several times faster and
+  smaller than loading Resident objects (load_only() entities are no
+  smaller: each instance keeps loaders for the columns left out). List
+  endpoints get their projections from App.serialization.
+"""
+from flask import current_app, has_app_context
+
+from App.database import db
+from .user import User
+from .admin import Admin
+from .driver import Driver
+from .resident import Resident
+
+# User LEFT OUTER JOIN admin, driver, resident
+polymorphic_user = db.with_polymorphic(User, [Admin, Driver, Resident])
+
+
+def user_entity():
+    """
+    The entity users are loaded through, per USER_POLYMORPHIC_LOADING:
+    - "with_polymorphic" (default): one query joins every subtype table
+    - "joined": the user row only; the first access to a subtype column
+      (resident.areaId, driver.status, ...) costs a second SELECT
+    """
+    config = current_app.config if has_app_context() else {}
+    if config.get("USER_POLYMORPHIC_LOADING", "with_polymorphic") == "joined":
+        return User
+    return polymorphic_user
+
+
+def load_user(user_id):
+    """session.get(User, user_id) through user_entity(): the identity map first, then one query."""
+    entity = user_entity()
+    if entity is User:
+        return db.session.get(User, user_id)
+    key = db.inspect(User).identity_key_from_primary_key((user_id,))
+    user = db.session.identity_map.get(key)
+    if user is not None:
+        return user
+    return db.session.scalars(db.select(entity).where(entity.id == user_id)).one_or_none()
+
+
+def credentials(entity=User):
+    return db.undefer(entity.password)
+
+
+def resident_listing():
+    return (
+        Resident.id, Resident.username, Resident.type,
+        Resident.areaId, Resident.streetId, Resident.houseNumber
+    )
@@ -0,0 +1,275 @@
+import hashlib
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from App.database import db
+from App.realtime import queue_wakeup
+
+TIMESTAMP_FORMAT = "%Y:%m:%d:%H:%M:%S"
+
+# A resident's inbox: the newest notifications, which duplicate messages are checked against
+MAX_INBOX_SIZE = 20
+
+# Street-wide drive events; each resident gets at most one notification per (drive, event)
+DRIVE_SCHEDULED = "scheduled"
+DRIVE_CANCELLED = "cancelled"
+
+# Process-wide counters for the drive fan-out pipeline
+fanout_stats = Counter(delivered=0, suppressed=0)
+
+
+def observer_message(payload):
+    """Text an observer update payload ({'drive_id', 'message'}) is stored as."""
+    drive_id = payload.get("drive_id")
+    base_message = (payload.get("message") or "").strip()
+    if drive_id is not None:
+        return f"Drive #{drive_id}: {base_message}".strip()
+    return base_message
+
+
+class Notification(db.Model):
+    __tablename__ = "notification"
+    __table_args__ = (
+        db.Index("ix_notification_resident_created", "residentId", "createdAt"),
+        db.Index("uq_notification_resident_drive_event",
+                 "residentId", "driveId", "event", unique=True),
+        db.Index("uq_notification_resident_dedup",
+                 "residentId", "dedupKey", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    residentId = db.Column(db.Integer,
+                           db.ForeignKey('resident.id'),
+                           nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    createdAt = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    driveId = db.Column(db.Integer, db.ForeignKey('drive.id'), nullable=True)
+    event = db.Column(db.String(20), nullable=True)
+    dedupKey = db.Column(db.String(64), nullable=True)
+    readAt = db.Column(db.DateTime, nullable=True)
+
+    resident = db.relationship('Resident', back_populates='notifications')
+
+    def __init__(self, residentId, message, createdAt=None, driveId=None, event=None, dedupKey=None):
+        self.residentId = residentId
+        self.message = message
+        self.createdAt = createdAt or datetime.now()
+        self.driveId = driveId
+        self.event = event
+        self.dedupKey = dedupKey
+
+    @staticmethod
+    def _bump_unread(*criteria):
+        # resident.unreadCount is maintained on write so polling never counts rows
+        resident = db.metadata.tables['resident']
+        db.session.execute(
+            db.update(resident)
+            .where(*criteria)
+            .values(unreadCount=resident.c.unreadCount + 1)
+        )
+
+    @classmethod
+    def deliver(cls, residentId, message):
+        """Adds one notification for the resident (no commit) and bumps their unread count."""
+        notif = cls(residentId=residentId, message=message)
+        db.session.add(notif)
+        db.session.flush()
+        cls._bump_unread(db.metadata.tables['resident'].c.id == residentId)
+        queue_wakeup(db.session, f"resident:{residentId}")
+        return notif
+
+    @staticmethod
+    def content_key(message):
+        return hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def release_stale_keys(cls, dedupKey, residents):
+        """
+        Clears dedupKey on the residents' notifications that have left their inbox
+        (older than the newest MAX_INBOX_SIZE), so the same message can be sent again.
+        - residents: a list of resident ids or a SELECT of them
+        Returns the number of rows released.
+        """
+        ranked = db.select(
+            cls.id,
+            db.func.row_number().over(
+                partition_by=cls.residentId,
+                order_by=(cls.createdAt.desc(), cls.id.desc())
+            ).label("rn")
+        ).where(cls.residentId.in_(residents)).subquery()
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.dedupKey == dedupKey, cls.residentId.in_(residents),
+                   cls.id.in_(db.select(ranked.c.id).where(ranked.c.rn > MAX_INBOX_SIZE)))
+            .values(dedupKey=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    @classmethod
+    def insert_ignore(cls, residentId, message, dedupKey=None):
+        """
+        Inserts the notification unless the resident's inbox (newest MAX_INBOX_SIZE)
+        already has one with the same dedupKey (defaults to the content hash).
+        Returns True if a row was written.
+        """
+        values = {
+            'residentId': residentId,
+            'message': message,
+            'createdAt': datetime.now(),
+            'dedupKey': dedupKey or cls.content_key(message)
+        }
+        inserted = cls._insert_keyed(values)
+        if not inserted and cls.release_stale_keys(values['dedupKey'], [residentId]):
+            # the duplicate had already left the inbox
+            inserted = cls._insert_keyed(values)
+
+        if inserted:
+            cls._bump_unread(db.metadata.tables['resident'].c.id == residentId)
+            queue_wakeup(db.session, f"resident:{residentId}")
+        return inserted
+
+    @classmethod
+    def _insert_keyed(cls, values):
+        """INSERT that does nothing on a (residentId, dedupKey) conflict; True if a row was written."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(cls).values(**values).on_conflict_do_nothing(
+                index_elements=['residentId', 'dedupKey']
+            )
+            inserted = db.session.execute(stmt).rowcount > 0
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(cls).values(**values))
+                inserted = True
+            except IntegrityError:
+                inserted = False
+        return inserted
+
+    @classmethod
+    def insert_for_street(cls, areaId, streetId, message, driveId=None, event=None):
+        """Queue one INSERT ... SELECT that gives every resident on the street the message."""
+        resident = db.metadata.tables['resident']
+        stamp = datetime.now()
+        recipients = db.select(
+            resident.c.id,
+            db.literal(message, db.Text),
+            db.literal(stamp, db.DateTime),
+            db.literal(driveId, db.Integer),
+            db.literal(event, db.String)
+        ).where(resident.c.areaId == areaId, resident.c.streetId == streetId)
+
+        if driveId is not None and event is not None:
+            # Idempotent: skip residents that already have this (drive, event)
+            already_sent = db.select(cls.id).where(
+                cls.residentId == resident.c.id,
+                cls.driveId == driveId,
+                cls.event == event
+            )
+            recipients = recipients.where(~already_sent.exists())
+
+        stmt = db.insert(cls).from_select(
+            ['residentId', 'message', 'createdAt', 'driveId', 'event'], recipients
+        ).returning(cls.residentId)
+        written = db.session.scalars(stmt).all()
+
+        if written:
+            cls._bump_unread(resident.c.id.in_(written))
+            queue_wakeup(db.session, f"street:{streetId}")
+        return len(written)
+
+    @classmethod
+    def insert_for_subscribers(cls, driveId, message):
+        """
+        One INSERT ... SELECT from drive_subscription giving every subscriber of the
+        drive the message, deduplicated on the content hash within each inbox like
+        insert_ignore.
+        No commit; returns the number of notifications written.
+        """
+        subscription = db.metadata.tables['drive_subscription']
+        resident = db.metadata.tables['resident']
+        stamp = datetime.now()
+        key = cls.content_key(message)
+        cls.release_stale_keys(
+            key, db.select(subscription.c.residentId).where(subscription.c.driveId == driveId)
+        )
+
+        already_sent = db.select(cls.id).where(
+            cls.residentId == subscription.c.residentId,
+            cls.dedupKey == key
+        )
+        recipients = db.select(
+            subscription.c.residentId,
+            db.literal(message, db.Text),
+            db.literal(stamp, db.DateTime),
+            db.literal(key, db.String)
+        ).where(subscription.c.driveId == driveId, ~already_sent.exists())
+
+        stmt = db.insert(cls).from_select(
+            ['residentId', 'message', 'createdAt', 'dedupKey'], recipients
+        ).returning(cls.residentId)
+        written = db.session.scalars(stmt).all()
+
+        if written:
+            cls._bump_unread(resident.c.id.in_(written))
+            queue_wakeup(db.session, *(f"resident:{rid}" for rid in written))
+        return len(written)
+
+    @classmethod
+    def drive_event_message(cls, drive, event):
+        when = f"{drive.date} at {drive.time.strftime('%H:%M')}"
+        if event == DRIVE_SCHEDULED:
+            return (
+                f"SCHEDULED>> Drive #{drive.id} by {drive.driver.username} to "
+                f"{drive.street.name}, {drive.area.name} on {when}. "
+                f"Login to request a stop and view the menu."
+            )
+        if event == DRIVE_CANCELLED:
+            return (
+                f"CANCELLED>> Drive #{drive.id} by {drive.driver.username} to "
+                f"{drive.street.name}, {drive.area.name} on {when} has been cancelled."
+            )
+        raise ValueError(f"Unknown drive event '{event}'.")
+
+    @classmethod
+    def fan_out_drive_event(cls, drive, event):
+        """
+        The single fan-out path for street-wide drive events.
+        Writes at most one notification per resident for (drive.id, event), without
+        committing, and returns (delivered, suppressed).
+        """
+        resident = db.metadata.tables['resident']
+        candidates = db.session.execute(
+            db.select(db.func.count()).select_from(resident).where(
+                resident.c.areaId == drive.areaId,
+                resident.c.streetId == drive.streetId
+            )
+        ).scalar()
+
+        delivered = cls.insert_for_street(
+            drive.areaId, drive.streetId,
+            cls.drive_event_message(drive, event),
+            driveId=drive.id, event=event
+        )
+        suppressed = candidates - delivered
+
+        fanout_stats["delivered"] += delivered
+        fanout_stats["suppressed"] += suppressed
+        return delivered, suppressed
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'residentId': self.residentId,
+            'message': self.message,
+            'createdAt': self.createdAt.strftime("%Y-%m-%d %H:%M:%S") if self.createdAt else None,
+            'read': self.readAt is not None
+        }
+
+    def __str__(self):
+        # Same "[timestamp]: message" shape the old JSON inbox stored
+        return f"[{self.createdAt.strftime(TIMESTAMP_FORMAT)}]: {self.message}"
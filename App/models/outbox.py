@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from App.database import db
+
+
+class OutboxMessage(db.Model):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        db.Index("ix_outbox_status_available", "status", "availableAt"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)    # "resident", "street", "drive_event"
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="Pending")  # "Pending", "Processing", "Failed"
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    availableAt = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    claimedBy = db.Column(db.String(64), nullable=True)
+    claimedAt = db.Column(db.DateTime, nullable=True)
+    lastError = db.Column(db.Text, nullable=True)
+    createdAt = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __init__(self, kind, payload):
+        self.kind = kind
+        self.payload = payload
+        self.status = "Pending"
+        self.attempts = 0
+        self.availableAt = datetime.now()
+        self.createdAt = self.availableAt
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'lastError': self.lastError
+        }
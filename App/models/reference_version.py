@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from App.database import db
+from .area import Area
+from .street import Street
+from .item import Item
+
+REFERENCE_MODELS = (Area, Street, Item)
+# table name -> its version column
+TABLE_COLUMNS = {'area': 'areaVersion', 'street': 'streetVersion', 'item': 'itemVersion'}
+# the request's memoised version (App.controllers.reference)
+VERSION_MEMO = "_reference_version"
+
+
+class ReferenceVersion(db.Model):
+    """
+    A single row of version tokens for the reference data, changed in the
+    same transaction as every write to areas, streets or items:
+    - version: any of them (the reference cache, App.controllers.reference)
+    - areaVersion / streetVersion / itemVersion: that table only (ETags)
+    - updatedAt: the last change, in UTC (Last-Modified)
+    """
+    __tablename__ = "reference_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+    areaVersion = db.Column(db.String(32), nullable=True)
+    streetVersion = db.Column(db.String(32), nullable=True)
+    itemVersion = db.Column(db.String(32), nullable=True)
+    updatedAt = db.Column(db.DateTime, nullable=True)
+
+    @classmethod
+    def current(cls):
+        """The row as a dict (every value None before the first write)."""
+        table = cls.__table__
+        row = db.session.execute(db.select(table).where(table.c.id == 1)).mappings().first()
+        return dict(row) if row else dict.fromkeys(table.c.keys())
+
+    @classmethod
+    def bump(cls, session=None, tables=TABLE_COLUMNS):
+        """Sets new tokens for the given table names (no commit), creating the row on first use."""
+        conn = (session or db.session).connection()
+        version = uuid.uuid4().hex
+        values = {'version': version, 'updatedAt': datetime.now(timezone.utc).replace(tzinfo=None)}
+        values.update({TABLE_COLUMNS[name]: version for name in tables})
+        table = cls.__table__
+        if conn.execute(table.update().where(table.c.id == 1).values(**values)).rowcount == 0:
+            conn.execute(table.insert().values(id=1, **values))
+        # later reads in this request see the write too
+        if has_request_context():
+            g.pop(VERSION_MEMO, None)
+        return version
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_reference_writes(session, flush_context, instances):
+    changed = {
+        obj.__tablename__
+        for objs in (session.new, session.dirty, session.deleted) for obj in objs
+        if isinstance(obj, REFERENCE_MODELS)
+    }
+    if changed:
+        ReferenceVersion.bump(session, changed)
@@ -1,18 +1,18 @@
 import re
-from datetime import datetime
-from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy import JSON
 
 from App.database import db
 from .user import User
 from .driver import Driver
 from .stop import Stop
-
-MAX_INBOX_SIZE = 20
+from .notification import Notification, observer_message, MAX_INBOX_SIZE
+from .drive_subscription import DriveSubscription
 
 
 class Resident(User):
     __tablename__ = "resident"
+    __table_args__ = (
+        db.Index("ix_resident_area_street", "areaId", "streetId"),
+    )
 
     id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
     areaId = db.Column(db.Integer, db.ForeignKey('area.id'), nullable=False)
@@ -20,7 +20,7 @@ class Resident(User):
                          db.ForeignKey('street.id'),
                          nullable=False)
     houseNumber = db.Column(db.Integer, nullable=False)
-    inbox = db.Column(MutableList.as_mutable(JSON), default=[])
+    unreadCount = db.Column(db.Integer, nullable=False, default=0)
 
     area = db.relationship("Area", backref='residents')
     street = db.relationship("Street", backref='residents')
@@ -29,6 +29,12 @@ class Resident(User):
         back_populates='resident',
         lazy='dynamic'  
     )
+    notifications = db.relationship(
+        'Notification',
+        back_populates='resident',
+        lazy='dynamic',
+        cascade='all, delete-orphan'
+    )
 
     __mapper_args__ = {
         "polymorphic_identity": "Resident",
@@ -39,6 +45,7 @@ class Resident(User):
         self.areaId = areaId
         self.streetId = streetId
         self.houseNumber = houseNumber
+        self.unreadCount = 0
 
     def get_json(self):
         user_json = super().get_json()
@@ -67,10 +74,11 @@ class Resident(User):
             return self.request_stop(drive_id)
 
         if isinstance(notification, int):
-            if self.inbox is None:
+            inbox = self.view_inbox()
+            if not inbox:
                 raise ValueError("Inbox is empty")
             try:
-                notif_str = self.inbox[notification]
+                notif_str = inbox[notification]
             except (IndexError, TypeError):
                 raise ValueError("Invalid notification index")
 
@@ -98,21 +106,32 @@ class Resident(User):
             db.session.commit()
         return
 
-    def receive_notif(self, message):
-        if self.inbox is None:
-            self.inbox = []
-
-        if len(self.inbox) >= MAX_INBOX_SIZE:
-            self.inbox.pop(0)
+    @property
+    def inbox(self):
+        return self.view_inbox()
 
-        timestamp = datetime.now().strftime("%Y:%m:%d:%H:%M:%S")
-        notif = f"[{timestamp}]: {message}"
-        self.inbox.append(notif)
-        db.session.add(self)
+    def receive_notif(self, message):
+        if self.id is None:
+            db.session.add(self)
+            db.session.flush()
+        notif = Notification.deliver(self.id, message)
         db.session.commit()
-
-    def view_inbox(self):
-        return self.inbox
+        return notif
+
+    def recent_notifications(self, limit=MAX_INBOX_SIZE):
+        if self.id is None:
+            return []
+        newest = (
+            self.notifications
+            .order_by(Notification.createdAt.desc(), Notification.id.desc())
+            .limit(limit)
+            .all()
+        )
+        newest.reverse()
+        return newest
+
+    def view_inbox(self, limit=MAX_INBOX_SIZE):
+        return [str(n) for n in self.recent_notifications(limit)]
     
     def viewNotificationHistory(self):
         return self.view_inbox()
@@ -122,45 +141,25 @@ class Resident(User):
         return driver
 
     def subscribe(self, drive):
-        if not hasattr(self, "_subscriptions"):
-            self._subscriptions = set()
-
-        if hasattr(drive, "registerObserver"):
-            drive.registerObserver(self)
-
-        if hasattr(drive, "id"):
-            self._subscriptions.add(drive.id)
+        drive.registerObserver(self)
+        db.session.commit()
 
     def unsubscribe(self, drive):
-        if not hasattr(self, "_subscriptions"):
-            self._subscriptions = set()
-
-        if hasattr(drive, "removeObserver"):
-            drive.removeObserver(self)
+        drive.removeObserver(self)
+        db.session.commit()
 
-        if hasattr(drive, "id") and drive.id in self._subscriptions:
-            self._subscriptions.remove(drive.id)
+    def subscribed_drive_ids(self):
+        return db.session.scalars(
+            db.select(DriveSubscription.driveId).where(DriveSubscription.residentId == self.id)
+        ).all()
 
-    
     def update(self, payload):
-        if self.inbox is None:
-            self.inbox = []
+        message_text = observer_message(payload)
 
-        drive_id = payload.get("drive_id")
-        base_message = (payload.get("message") or "").strip()
+        if self.id is None:
+            db.session.add(self)
+            db.session.flush()
 
-        if drive_id is not None:
-            message_text = f"Drive #{drive_id}: {base_message}".strip()
-        else:
-            message_text = base_message
-
-        for entry in self.inbox:
-            if "]: " in entry:
-                _, body = entry.split("]: ", 1)
-            else:
-                body = entry
-
-            if body == message_text:
-                return 
-            
-        self.receive_notif(message_text)
+        # The unique (residentId, dedupKey) index does the duplicate check, within the inbox
+        Notification.insert_ignore(self.id, message_text)
+        db.session.commit()
@@ -2,6 +2,10 @@ from App.database import db
 
 
 class Stop(db.Model):
+    __table_args__ = (
+        db.Index("ix_stop_drive_resident", "driveId", "residentId"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     driveId = db.Column(db.Integer, db.ForeignKey('drive.id'), nullable=False)
     residentId = db.Column(db.Integer,
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from App.database import db
+from App.realtime import queue_wakeup
+
+# Events on a driver's live stop feed
+STOP_CREATED = "stop_created"
+STOP_CANCELLED = "stop_cancelled"
+STOP_STATUS = "stop_status"
+
+
+class StopEvent(db.Model):
+    """
+    Append-only log of changes to the stops on a driver's drives.
+    Stops are deleted when a resident cancels, so the driver feed replays from here.
+    """
+    __tablename__ = "stop_event"
+    __table_args__ = (
+        db.Index("ix_stop_event_driver", "driverId", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    driverId = db.Column(db.Integer, db.ForeignKey('driver.id'), nullable=False)
+    driveId = db.Column(db.Integer, db.ForeignKey('drive.id'), nullable=False)
+    stopId = db.Column(db.Integer, nullable=False)   # no FK: the stop may be gone
+    residentId = db.Column(db.Integer, db.ForeignKey('resident.id'), nullable=False)
+    event = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=True)
+    createdAt = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    resident = db.relationship('Resident')
+
+    def __init__(self, driverId, driveId, stopId, residentId, event, status=None):
+        self.driverId = driverId
+        self.driveId = driveId
+        self.stopId = stopId
+        self.residentId = residentId
+        self.event = event
+        self.status = status
+        self.createdAt = datetime.now()
+
+    @classmethod
+    def record(cls, stop, event, drive=None):
+        """Adds an event for the stop (no commit) and wakes the driver's feed after commit."""
+        drive = drive or stop.drive
+        if stop.id is None:
+            db.session.flush()
+        entry = cls(
+            driverId=drive.driverId,
+            driveId=drive.id,
+            stopId=stop.id,
+            residentId=stop.residentId,
+            event=event,
+            status=stop.status
+        )
+        db.session.add(entry)
+        queue_wakeup(db.session, f"driver:{drive.driverId}")
+        return entry
+
+    def get_json(self):
+        resident = self.resident
+        return {
+            'id': self.id,
+            'event': self.event,
+            'driveId': self.driveId,
+            'stopId': self.stopId,
+            'status': self.status,
+            'resident': {
+                'id': self.residentId,
+                'username': resident.username,
+                'houseNumber': resident.houseNumber,
+                'street': resident.street.name if resident.street else None,
+                'area': resident.area.name if resident.area else None
+            } if resident else {'id': self.residentId},
+            'createdAt': self.createdAt.strftime("%Y-%m-%d %H:%M:%S") if self.createdAt else None
+        }
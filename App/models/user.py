@@ -7,7 +7,8 @@ class User(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     username =  db.Column(db.String(20), nullable=False, unique=True)
-    password = db.Column(db.String(256), nullable=False)
+    # deferred: only logging in needs the hash (see App.models.loading)
+    password = db.deferred(db.Column(db.String(256), nullable=False))
     logged_in = db.Column(db.Boolean, nullable=False, default=False)
     type = db.Column(db.String(50))
 
@@ -20,7 +21,6 @@ class User(db.Model):
         self.username = username
         self.set_password(password)
         self.logged_in = False
-        self.inbox = []
 
     def get_json(self):
         return{
@@ -0,0 +1,359 @@
+"""
+Event bus backends for the Observer pattern.
+
+A Subject bound to a bus publishes to a topic instead of calling its observers
+directly; every process running the bus receives the event and calls the
+observers attached there. Backends:
+
+- InProcessBus: one process only (tests, the dev server)
+- PostgresBus: NOTIFY on the application database, LISTEN in every process
+- SocketBus: one Unix datagram socket per process in a shared directory,
+  for SQLite/dev setups without Postgres
+
+All backends share the same pipeline:
+- publish() puts the event on a bounded outgoing queue. When the queue is full
+  it blocks for up to `publish_timeout` seconds and then raises EventBusFull,
+  so a slow transport pushes back on publishers instead of growing memory.
+- the bus threads start on the first publish() or start() in each process (after
+  a gunicorn fork, never in the master); subscribers that expect events from other
+  processes call start().
+- a sender thread drains the queue into batches of up to `batch_size` events and
+  hands each batch to the transport in one NOTIFY / datagram. Batching adds no
+  delay: a batch is whatever has queued up while the previous one was sent.
+- received events go through a bounded incoming queue to a dispatcher thread
+  that calls the handlers. Events that cannot be queued are dropped and counted.
+
+Handlers run on the dispatcher thread, outside any request. A bus bound to an
+app (init_event_bus) pushes an app context around each handler, so observers can
+use db.session there; the session is removed again when the context pops.
+"""
+import abc
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+PG_CHANNEL = "breadvan_events"
+PG_PAYLOAD_LIMIT = 7900        # NOTIFY payloads must stay under 8000 bytes
+SOCKET_PAYLOAD_LIMIT = 60000
+
+
+class EventBusFull(Exception):
+    """Raised by publish() when the outgoing queue stays full for publish_timeout."""
+
+
+class EventBus(abc.ABC):
+
+    def __init__(self, batch_size=100, max_queue=10000, publish_timeout=1.0, app=None):
+        self.app = app
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.publish_timeout = publish_timeout
+        self.stats = Counter(published=0, sent=0, batches=0, received=0, delivered=0,
+                             dropped=0, rejected=0)
+        self._handlers = {}
+        self._handlers_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+    # Subscribers
+    ##################################################################################
+
+    def subscribe(self, topic, handler):
+        with self._handlers_lock:
+            self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic, handler):
+        with self._handlers_lock:
+            handlers = self._handlers.get(topic, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                self._handlers.pop(topic, None)
+
+    # Publishing
+    ##################################################################################
+
+    def publish(self, topic, payload):
+        self.start()
+        try:
+            self._outgoing.put((topic, payload), timeout=self.publish_timeout)
+        except queue.Full:
+            self.stats["rejected"] += 1
+            raise EventBusFull(f"Event bus queue is full ({self.max_queue} events).")
+        self.stats["published"] += 1
+
+    def flush(self):
+        """Blocks until every event published so far has been handed to the transport."""
+        if self._pid == os.getpid():
+            self._outgoing.join()
+
+    # Lifecycle
+    ##################################################################################
+
+    def start(self):
+        """Starts the bus threads once per process (after a gunicorn fork, not before)."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._outgoing = queue.Queue(self.max_queue)
+            self._incoming = queue.Queue(self.max_queue)
+            self._setup()
+            for target in (self._send_loop, self._dispatch_loop, self._listen):
+                threading.Thread(target=target, name=f"{type(self).__name__}.{target.__name__}",
+                                 daemon=True).start()
+            self._pid = os.getpid()
+
+    def _send_loop(self):
+        while True:
+            batch = [self._outgoing.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._outgoing.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._send(batch)
+                self.stats["sent"] += len(batch)
+                self.stats["batches"] += 1
+            except Exception:
+                self.stats["dropped"] += len(batch)
+                logger.exception("Event bus failed to send %s event(s)", len(batch))
+            finally:
+                for _ in batch:
+                    self._outgoing.task_done()
+
+    def _receive(self, events):
+        for event in events:
+            try:
+                self._incoming.put(tuple(event), timeout=self.publish_timeout)
+                self.stats["received"] += 1
+            except queue.Full:
+                self.stats["dropped"] += 1
+
+    def _dispatch_loop(self):
+        while True:
+            topic, payload = self._incoming.get()
+            with self._handlers_lock:
+                handlers = list(self._handlers.get(topic, ()))
+            for handler in handlers:
+                try:
+                    self._call(handler, payload)
+                except Exception:
+                    logger.exception("Event bus handler for %r failed", topic)
+            self.stats["delivered"] += 1
+
+    def _call(self, handler, payload):
+        if self.app is None:
+            handler(payload)
+            return
+        with self.app.app_context():
+            handler(payload)
+
+    # Transport
+    ##################################################################################
+
+    def _setup(self):
+        pass
+
+    def _listen(self):
+        pass
+
+    @abc.abstractmethod
+    def _send(self, batch):
+        """Hands one batch of (topic, payload) events to the transport."""
+
+    @staticmethod
+    def _chunks(batch, limit):
+        """Splits a batch into JSON payloads no larger than limit bytes."""
+        chunk, size = [], 2
+        for event in batch:
+            encoded = json.dumps(event)
+            if chunk and size + len(encoded) + 1 > limit:
+                yield f"[{','.join(chunk)}]"
+                chunk, size = [], 2
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        if chunk:
+            yield f"[{','.join(chunk)}]"
+
+
+class InProcessBus(EventBus):
+
+    def _send(self, batch):
+        self._receive(batch)
+
+
+class PostgresBus(EventBus):
+
+    def __init__(self, engine, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+
+    def _send(self, batch):
+        with self.engine.begin() as conn:
+            for payload in self._chunks(batch, PG_PAYLOAD_LIMIT):
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {"channel": PG_CHANNEL, "payload": payload})
+
+    def _listen(self):
+        while True:
+            raw = None
+            try:
+                raw = self.engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {PG_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._receive(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Postgres event bus listener failed; reconnecting")
+                threading.Event().wait(1)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+
+class SocketBus(EventBus):
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self._sock = None
+
+    def _setup(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(path)
+
+    def _listen(self):
+        while True:
+            try:
+                self._receive(json.loads(self._sock.recv(SOCKET_PAYLOAD_LIMIT + 1024)))
+            except Exception:
+                logger.exception("Socket event bus listener failed")
+
+    def _send(self, batch):
+        payloads = [p.encode() for p in self._chunks(batch, SOCKET_PAYLOAD_LIMIT)]
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            # A full receive buffer blocks the send: backpressure from slow processes,
+            # bounded so one stuck process cannot stall the others
+            sender.settimeout(self.publish_timeout)
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                try:
+                    for payload in payloads:
+                        sender.sendto(payload, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # process that has gone away
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                except (socket.timeout, OSError):
+                    self.stats["dropped"] += len(batch)
+                    logger.warning("Event bus could not reach %s", path)
+
+
+def create_event_bus(kind, engine=None, directory=None, **kwargs):
+    """Builds the backend named by kind: "local", "postgres" or "socket"."""
+    if kind == "postgres":
+        return PostgresBus(engine, **kwargs)
+    if kind == "socket":
+        return SocketBus(directory, **kwargs)
+    if kind == "local":
+        return InProcessBus(**kwargs)
+    raise ValueError(f"Unknown event bus backend '{kind}'.")
+
+
+def init_event_bus(app, current=None):
+    """
+    The app's event bus, kept in app.extensions["event_bus"] and bound to app.
+    The backend comes from EVENT_BUS_BACKEND ("local", "postgres", "socket"):
+    "local" under TESTING, "postgres" on a Postgres database, "socket" otherwise.
+    - current: the bus already running in this process; a local one is reused
+      rather than starting another set of threads
+    """
+    kind = app.config.get("EVENT_BUS_BACKEND")
+    if not kind:
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
+        if app.config.get("TESTING"):
+            kind = "local"
+        elif uri.startswith("postgres"):
+            kind = "postgres"
+        else:
+            kind = "socket"
+
+    if kind == "local" and isinstance(current, InProcessBus):
+        bus = current
+    else:
+        engine = None
+        if kind == "postgres":
+            from App.database import db
+            with app.app_context():
+                engine = db.engine
+        directory = app.config.get("EVENT_BUS_SOCKET_DIR") or os.path.join(
+            tempfile.gettempdir(), "breadvan-events")
+        bus = create_event_bus(kind, engine=engine, directory=directory)
+    bus.app = app
+    app.extensions["event_bus"] = bus
+    return bus
+
+
+def benchmark(bus, events=10000, payload=None, timeout=60):
+    """
+    Publishes `events` events on a fresh topic and waits until this process has
+    received them all back through the transport. Returns a dict with the
+    events/second, batches used and events dropped.
+    """
+    topic = f"benchmark.{uuid.uuid4().hex[:8]}"
+    payload = payload if payload is not None else {"drive_id": 1, "message": "Van is 5 minutes away"}
+    done = threading.Event()
+    seen = Counter()
+
+    def handler(_):
+        seen["events"] += 1
+        if seen["events"] >= events:
+            done.set()
+
+    bus.subscribe(topic, handler)
+    bus.start()
+    before = Counter(bus.stats)
+    started = time.perf_counter()
+    try:
+        for _ in range(events):
+            bus.publish(topic, payload)
+        done.wait(timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        bus.unsubscribe(topic, handler)
+
+    return {
+        'events': seen["events"],
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(seen["events"] / elapsed) if elapsed else 0,
+        'batches': bus.stats["batches"] - before["batches"],
+        'dropped': bus.stats["dropped"] - before["dropped"]
+    }
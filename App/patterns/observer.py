@@ -1,15 +1,23 @@
 """
 Observer Pattern implementation for Bread Van App
-This pattern allows Drivers (Subjects) to notify Residents (Observers) of events
+This pattern allows Drivers (Subjects) to notify Residents (Observers) of events.
+A Subject bound to an event bus (App/patterns/event_bus.py) reaches the observers
+attached to the same topic in every worker process, not just its own. Use the
+app's bus (current_app.extensions["event_bus"]) so observers run in an app context.
 """
 
 
 class Subject:
     """Driver acts as Subject - maintains list of observer Residents"""
     
-    def __init__(self):
-        # List of observers (Residents) subscribed to this Driver
+    def __init__(self, topic=None, bus=None):
+        # List of observers (Residents) subscribed to this Driver in this process
         self._observers = []
+        self._topic = topic
+        self._bus = bus
+        if bus is not None:
+            bus.subscribe(topic, self._deliver)
+            bus.start()
     
     def attach(self, observer):
         """
@@ -27,9 +35,22 @@ class Subject:
     
     def notify_observers(self, message):
         """
-        Notify all subscribed observers with a message
+        Notify all subscribed observers with a message.
+        With a bus the message is published to the topic and delivered in every process;
+        it must then be JSON-serialisable.
         """
-        for observer in self._observers:
+        if self._bus is None:
+            self._deliver(message)
+        else:
+            self._bus.publish(self._topic, message)
+
+    def close(self):
+        """Stops receiving the topic's events from the bus."""
+        if self._bus is not None:
+            self._bus.unsubscribe(self._topic, self._deliver)
+
+    def _deliver(self, message):
+        for observer in list(self._observers):
             observer.update(message)
 
 
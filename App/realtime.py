@@ -0,0 +1,161 @@
+"""
+Live notification wake-ups for the SSE streams.
+
+Each web worker keeps one in-process Broadcaster. Writers record which channels
+they touched ("resident:<id>", "street:<id>", "driver:<id>") on the SQLAlchemy
+session, and once the transaction commits the channels are published on the
+app's event bus (App/patterns/event_bus.py, init_event_bus) so that every
+worker (and the notifications worker process) can reach every stream.
+
+Wake-ups carry no payload; streams re-read their rows from the database.
+"""
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from App.patterns.event_bus import InProcessBus, init_event_bus
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = "realtime_channels"
+WAKEUP_TOPIC = "realtime.wakeup"
+
+
+class Subscription:
+    """One stream's interest in a set of channels. Wake-ups coalesce into a single flag."""
+
+    def __init__(self, broadcaster, channels):
+        self.channels = frozenset(channels)
+        self._broadcaster = broadcaster
+        self._wake = threading.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def wait(self, timeout):
+        woke = self._wake.wait(timeout)
+        self._wake.clear()
+        return woke
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broadcaster:
+    """In-process registry of live streams, woken by channel name over the event bus."""
+
+    def __init__(self, bus=None):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self.bus = None
+        self.use(bus or InProcessBus())
+
+    def use(self, bus):
+        if self.bus is not None:
+            self.bus.unsubscribe(WAKEUP_TOPIC, self.dispatch)
+        self.bus = bus
+        bus.subscribe(WAKEUP_TOPIC, self.dispatch)
+
+    def subscribe(self, channels):
+        self.bus.start()
+        sub = Subscription(self, channels)
+        with self._lock:
+            for channel in sub.channels:
+                self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._subscribers.get(channel)
+                if subs:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[channel]
+
+    def dispatch(self, channels):
+        """Wakes the streams in this process listening on any of the channels."""
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets.update(self._subscribers.get(channel, ()))
+        for sub in targets:
+            sub.notify()
+
+    def publish(self, channels):
+        """Wakes the streams listening on the channels in every worker."""
+        if channels:
+            self.bus.publish(WAKEUP_TOPIC, sorted(channels))
+
+
+broadcaster = Broadcaster()
+
+
+def queue_wakeup(session, *channels):
+    """Records channels to publish once the session's transaction commits."""
+    session.info.setdefault(SESSION_KEY, set()).update(channels)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    channels = session.info.pop(SESSION_KEY, None)
+    if not channels:
+        return
+    try:
+        broadcaster.publish(channels)
+    except Exception:
+        logger.exception("Failed to publish wake-up for %s", channels)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(SESSION_KEY, None)
+
+
+def event_stream(channels, read_since, last_id, event, heartbeat=15, timeout=300):
+    """
+    Server-Sent Events generator shared by the live feeds.
+    - read_since(last_id) returns rows (with .id and get_json()) newer than last_id
+    - each row is sent as an `event` frame whose id is the row id, so clients
+      resume with Last-Event-ID
+    - idle streams send a heartbeat comment and close after `timeout` seconds
+    """
+    from App.database import db
+
+    deadline = time.monotonic() + timeout
+
+    # Subscribe before the first read so nothing written in between is missed
+    with broadcaster.subscribe(channels) as sub:
+        yield "retry: 3000\n\n"
+        while True:
+            frames = []
+            for row in read_since(last_id):
+                last_id = row.id
+                frames.append(f"id: {row.id}\nevent: {event}\ndata: {json.dumps(row.get_json())}\n\n")
+            # Give the connection back to the pool while the stream idles
+            db.session.remove()
+            if frames:
+                yield "".join(frames)
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not sub.wait(min(heartbeat, remaining)):
+                yield ": heartbeat\n\n"
+
+
+def init_realtime(app):
+    """Wakes this process's streams over the app's event bus (init_event_bus)."""
+    broadcaster.use(init_event_bus(app, current=broadcaster.bus))
+    return broadcaster
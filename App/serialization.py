@@ -0,0 +1,236 @@
+"""
+JSON serialization for the list endpoints.
+
+A Serializer pairs a model with the columns its JSON needs. List endpoints
+select those columns only (plain rows: no ORM objects, identity map or
+polymorphic joins) and turn each row into the same dict the model's get_json()
+would build. Register one per model with `register`, look it up with
+`serializer_for`; `only()` narrows one to the fields a client asked for
+(?fields=id,username), so the SELECT lists just those columns.
+
+List endpoints answer in one of two shapes (`page_response`):
+- JSON (default): {"items": [{...}, ...], "next", "prev"[, "total"]}
+- columnar, with `Accept: application/vnd.breadvan.columnar+json` or
+  `?format=columnar`: {"columns": [...], "rows": [[...], ...], "next", ...};
+  the keys are sent once instead of once per item, and projection rows become
+  lists without a dict per row
+
+JSONProvider encodes responses with orjson when it is installed (and
+FAST_JSON is on), falling back to Flask's encoder otherwise. The output is
+the same either way: keys sorted, dates through Flask's `default`.
+"""
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.sql.util import find_tables
+
+from App.database import db
+from App.models import User, Driver, Resident, Drive, Stop, Notification, DriveSubscription
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+COLUMNAR_MIMETYPE = "application/vnd.breadvan.columnar+json"
+# only() Serializers kept per registered Serializer, least recently used dropped first
+MAX_SUBSETS = 128
+
+
+def timestamp(value):
+    return value.strftime(TIMESTAMP) if value else None
+
+
+def day(value):
+    return value.strftime("%Y-%m-%d") if value else None
+
+
+def clock(value):
+    return value.strftime("%H:%M:%S") if value else None
+
+
+class Serializer:
+    """
+    fields maps each JSON key to a column, or to (column, format) when the
+    value needs converting (dates, flags).
+    - default: the keys listed when the client names none (all of them otherwise)
+    - joins: (table, onclause) outer joins, added only when a selected column
+      needs that table (a resident's street on a user listing)
+    """
+
+    def __init__(self, model, fields, default=None, joins=(), keep=()):
+        self.model = model
+        self.available = fields
+        self.default = default
+        self.joins = joins
+        self.fields = []
+        columns = {}
+        for name in default or fields:
+            spec = fields[name]
+            column, fmt = spec if isinstance(spec, tuple) else (spec, None)
+            columns.setdefault(column.key, column)
+            self.fields.append((name, column.key, fmt))
+        for column in keep:
+            columns.setdefault(column.key, column)
+        # rows of select() already hold the values in field order: no per-field work
+        self._verbatim = (all(fmt is None for _, _, fmt in self.fields)
+                          and [key for _, key, _ in self.fields] == list(columns))
+        self.columns = list(columns.values())
+        self.names = [name for name, _, _ in self.fields]
+        self._subsets = OrderedDict()
+        self._subsets_lock = threading.Lock()
+
+    def only(self, names=None, keep=()):
+        """
+        The Serializer for a sparse fieldset (?fields=): just `names`, or the
+        defaults when None, also selecting `keep` (keyset sort columns) without
+        listing them. Unrequested columns are never selected.
+        - repeated names count once (first one wins the position)
+        - the last MAX_SUBSETS fieldsets are cached
+        """
+        names = list(dict.fromkeys(names or ()))
+        unknown = [name for name in names if name not in self.available]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(self.available)}.")
+        key = (tuple(names), tuple(c.key for c in keep))
+        with self._subsets_lock:
+            subset = self._subsets.get(key)
+            if subset is not None:
+                self._subsets.move_to_end(key)
+                return subset
+        subset = Serializer(self.model, self.available, names or self.default, self.joins, keep)
+        with self._subsets_lock:
+            self._subsets[key] = subset
+            while len(self._subsets) > MAX_SUBSETS:
+                self._subsets.popitem(last=False)
+        return subset
+
+    def _joined(self, query):
+        tables = set()
+        for column in self.columns:
+            tables.update(find_tables(column.__clause_element__(), check_columns=True))
+        for table, onclause in self.joins:
+            if table in tables:
+                query = query.outerjoin(table, onclause)
+        return query
+
+    def query(self):
+        """A Query over just the columns, for keyset_page."""
+        return self._joined(db.session.query(*self.columns).select_from(self.model))
+
+    def select(self):
+        return self._joined(db.select(*self.columns).select_from(self.model))
+
+    def dump(self, row):
+        out = {}
+        for name, key, fmt in self.fields:
+            value = getattr(row, key)
+            out[name] = fmt(value) if fmt else value
+        return out
+
+    def dump_all(self, rows):
+        return [self.dump(row) for row in rows]
+
+    def values(self, row):
+        """The row's JSON values as a list, in the order of self.names."""
+        return [fmt(getattr(row, key)) if fmt else getattr(row, key) for _, key, fmt in self.fields]
+
+    def values_all(self, rows):
+        if self._verbatim:
+            return [list(row) for row in rows]
+        return [self.values(row) for row in rows]
+
+
+_serializers = {}
+
+
+def register(model, fields, default=None, joins=()):
+    _serializers[model] = Serializer(model, fields, default, joins)
+    return _serializers[model]
+
+
+def serializer_for(model):
+    return _serializers[model]
+
+
+# Listed as (id, username, type) unless the subtype columns are asked for by name
+register(User, {
+    'id': User.id,
+    'username': User.username,
+    'type': User.type,
+    'status': Driver.status,
+    'areaId': db.func.coalesce(Resident.areaId, Driver.areaId).label('areaId'),
+    'streetId': db.func.coalesce(Resident.streetId, Driver.streetId).label('streetId'),
+    'houseNumber': Resident.houseNumber
+}, default=['id', 'username', 'type'], joins=[
+    (Driver.__table__, Driver.__table__.c.id == User.id),
+    (Resident.__table__, Resident.__table__.c.id == User.id)
+])
+
+register(Drive, {
+    'id': Drive.id,
+    'driverId': Drive.driverId,
+    'areaId': Drive.areaId,
+    'streetId': Drive.streetId,
+    'date': (Drive.date, day),
+    'time': (Drive.time, clock),
+    'status': Drive.status
+})
+
+register(Stop, {'id': Stop.id, 'driveId': Stop.driveId, 'residentId': Stop.residentId})
+
+register(Notification, {
+    'id': Notification.id,
+    'residentId': Notification.residentId,
+    'message': Notification.message,
+    'createdAt': (Notification.createdAt, timestamp),
+    'read': (Notification.readAt, lambda value: value is not None)
+})
+
+register(DriveSubscription, {
+    'id': DriveSubscription.id,
+    'driveId': DriveSubscription.driveId,
+    'residentId': DriveSubscription.residentId,
+    'createdAt': (DriveSubscription.createdAt, timestamp)
+})
+
+
+def wants_columnar():
+    """True when the request asks for the columnar shape (?format=columnar or the Accept header)."""
+    if 'format' in request.args:
+        return request.args['format'] == 'columnar'
+    return request.accept_mimetypes.best_match(["application/json", COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+
+def page_response(page):
+    """A list endpoint's response for page, in the shape the client asked for."""
+    if wants_columnar():
+        response = current_app.json.response(page.get_columnar())
+        response.mimetype = COLUMNAR_MIMETYPE
+    else:
+        response = current_app.json.response(page.get_json())
+    response.vary.add('Accept')
+    return response
+
+
+class JSONProvider(DefaultJSONProvider):
+
+    def response(self, *args, **kwargs):
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson is None or pretty or not self._app.config.get("FAST_JSON", True):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b"\n", mimetype=self.mimetype)
+
+    def encode(self, obj):
+        """The compact response body as bytes."""
+        if orjson is None:
+            return self.dumps(obj, separators=(",", ":")).encode()
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
@@ -1,6 +1,6 @@
-
-async function getUserData(){
-    const response = await fetch('/api/users');
+async function getUserData(cursor){
+    const url = cursor ? `/api/users?cursor=${encodeURIComponent(cursor)}` : '/api/users';
+    const response = await fetch(url);
     return response.json();
 }
 
@@ -15,8 +15,13 @@ function loadTable(users){
 }
 
 async function main(){
-    const users = await getUserData();
-    loadTable(users);
+    // /api/users is paginated; follow the next cursors until the last page
+    let page = await getUserData();
+    loadTable(page.items);
+    while(page.next){
+        page = await getUserData(page.next);
+        loadTable(page.items);
+    }
 }
 
-main();
\ No newline at end of file
+main();
@@ -1,6 +1,11 @@
+import json
 import os
 import tempfile
+import threading
 import unittest
+from contextlib import contextmanager
+from unittest import mock
+from sqlalchemy import event
 from datetime import date, time, datetime, timedelta
 
 from App.main import create_app
@@ -8,8 +13,10 @@ from App.models import Driver, Drive
 from App.database import db, create_db
 from App.models import (
     User, Resident, Driver, Admin,
-    Area, Street, Drive, Stop, Item, DriverStock
+    Area, Street, Drive, Stop, Item, DriverStock, Notification, OutboxMessage,
+    DriveSubscription
 )
+from App.models.resident import MAX_INBOX_SIZE
 from App.controllers import (
     create_user, get_all_users_json, update_user, get_user,
     user_login, user_logout,
@@ -17,12 +24,29 @@ from App.controllers import (
     resident_view_driver_stats, resident_view_stock, resident_view_inbox,
     driver_schedule_drive, driver_cancel_drive, driver_view_drives,
     driver_start_drive, driver_end_drive, driver_view_requested_stops,
-    driver_update_stock, driver_view_stock,
+    driver_update_stock, driver_view_stock, driver_drives_page,
     admin_create_driver, admin_delete_driver, admin_add_area,
     admin_delete_area, admin_view_all_areas, admin_add_street,
     admin_delete_street, admin_view_all_streets, admin_add_item,
-    admin_delete_item, admin_view_all_items
+    admin_delete_item, admin_view_all_items, admin_dashboard_summary,
+    prune_notifications, notify_street, notify_drive_event, get_fanout_stats,
+    queue_resident_notification, drain_outbox,
+    resident_inbox_page, resident_unread_count, resident_mark_read
 )
+from App.controllers.driver import driver_approve_stop, driver_stop_events_since
+from App.controllers.user import get_users_page
+from App.controllers.reference import stats as reference_stats
+from App.controllers.street import get_streets_for_area
+from App.controllers.drive import get_drives_for_street
+from App.serialization import serializer_for
+from App.controllers.outbox import MAX_ATTEMPTS
+from App.controllers.auth import login
+from App.controllers.identity import clear_identity_cache, current_identity, token_cache
+from App.controllers.diagnostics import explain_hot_queries
+from App.realtime import Broadcaster
+from App.patterns.event_bus import InProcessBus, SocketBus, EventBusFull, benchmark
+from App.patterns.observer import Subject, Observer
+from App.models.notification import DRIVE_SCHEDULED
 
 
 # ============================================================
@@ -267,6 +291,21 @@ class DriverStockUnitTests(unittest.TestCase):
 #  Integration Tests (DB + Controllers)
 # ============================================================
 
+@contextmanager
+def count_queries():
+    """Collects the SQL statements run inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
 class BaseIntegrationTest(unittest.TestCase):
 
     def setUp(self):
@@ -475,6 +514,38 @@ class DriverIntegrationTests(BaseIntegrationTest):
             drives = driver_view_drives(driver)
             self.assertGreaterEqual(len(drives), 1)
 
+    def test_drives_are_filtered_and_paged_in_sql(self):
+        with self.app.app_context():
+            area, street, driver = self._setup_area_street_driver()
+            for day in range(1, 6):
+                when = (datetime.now() + timedelta(days=day)).strftime("%Y-%m-%d")
+                driver_schedule_drive(driver, area.id, street.id, when, "11:30")
+            first = driver_view_drives(driver)[0]
+            driver_start_drive(driver, first.id)
+            driver_end_drive(driver)
+
+            page = driver_drives_page(driver, limit=3)
+            page = driver_drives_page(driver, cursor=page.next, limit=3)
+            self.assertEqual(page.total, 4)
+            self.assertEqual(len(page), 1)
+            self.assertIsNone(page.next)
+
+            page = driver_drives_page(driver, statuses=None)
+            self.assertEqual(page.total, 5)
+            self.assertEqual(page.items[0].id, first.id)
+
+            token = login("steve", "stevepass")
+            client = self.app.test_client()
+            resp = client.get(
+                "/driver/drives?status=Completed&limit=10",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            self.assertEqual(resp.get_json()["total"], 1)
+            self.assertEqual(resp.get_json()["items"][0]["id"], first.id)
+
+            resp = client.get("/driver/drives?from=tomorrow", headers={"Authorization": f"Bearer {token}"})
+            self.assertEqual(resp.status_code, 422)
+
     def test_start_and_end_drive(self):
         with self.app.app_context():
             area, street, driver = self._setup_area_street_driver()
@@ -566,6 +637,894 @@ class AdminIntegrationTests(BaseIntegrationTest):
             self.assertIsNone(Item.query.get(item.id))
 
 
+class NotificationIntegrationTests(BaseIntegrationTest):
+
+    def _setup_resident(self, username="john"):
+        area = admin_add_area("Sangre Grande")
+        street = admin_add_street(area.id, "Picton Road")
+        return resident_create(username, "johnpass", area.id, street.id, 123)
+
+    def test_receive_notif_inserts_row(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            res.receive_notif("hello")
+            rows = Notification.query.filter_by(residentId=res.id).all()
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0].message, "hello")
+            self.assertTrue(resident_view_inbox(res)[-1].endswith("hello"))
+
+    def test_inbox_shows_newest_entries(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            for i in range(MAX_INBOX_SIZE + 5):
+                res.receive_notif(f"msg{i}")
+            inbox = res.view_inbox()
+            self.assertEqual(len(inbox), MAX_INBOX_SIZE)
+            self.assertTrue(inbox[0].endswith("msg5"))
+            self.assertTrue(inbox[-1].endswith(f"msg{MAX_INBOX_SIZE + 4}"))
+
+    def test_prune_notifications(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            for i in range(5):
+                res.receive_notif(f"msg{i}")
+            removed = prune_notifications(keep=2)
+            self.assertEqual(removed, 3)
+            self.assertEqual(Notification.query.filter_by(residentId=res.id).count(), 2)
+            self.assertTrue(res.view_inbox()[0].endswith("msg3"))
+
+    def test_update_dedups_by_content_hash(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            res.update({"drive_id": 7, "message": "Van is 5 minutes away"})
+            res.update({"drive_id": 7, "message": "Van is 5 minutes away "})
+            res.update({"drive_id": 7, "message": "Van has arrived"})
+
+            rows = Notification.query.filter_by(residentId=res.id).all()
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(rows[0].dedupKey, Notification.content_key("Drive #7: Van is 5 minutes away"))
+
+            # once it has left the inbox the same message is delivered again
+            for i in range(MAX_INBOX_SIZE):
+                res.receive_notif(f"msg{i}")
+            res.update({"drive_id": 7, "message": "Van is 5 minutes away"})
+            self.assertEqual(Notification.query.filter_by(residentId=res.id).count(), MAX_INBOX_SIZE + 3)
+            self.assertTrue(res.view_inbox()[-1].endswith("Drive #7: Van is 5 minutes away"))
+
+    def test_notify_street_bulk_fanout(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            other = admin_add_street(area.id, "Ojoe Road")
+            residents = [
+                resident_create(f"res{i}", "pass", area.id, street.id, i)
+                for i in range(3)
+            ]
+            outsider = resident_create("outsider", "pass", area.id, other.id, 9)
+
+            report = notify_street(area.id, street.id, "Van is coming")
+
+            self.assertEqual(report["residents"], 3)
+            self.assertIn("elapsed_ms", report)
+            for r in residents:
+                self.assertTrue(r.view_inbox()[-1].endswith("Van is coming"))
+            self.assertEqual(outsider.view_inbox(), [])
+
+    def test_drive_fanout_is_idempotent(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            driver = admin_create_driver("steve", "stevepass")
+            res = resident_create("john", "johnpass", area.id, street.id, 123)
+
+            future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            drive = driver_schedule_drive(driver, area.id, street.id, future_date, "11:30")
+            drain_outbox()
+            before = get_fanout_stats()["suppressed"]
+
+            self.assertEqual(resident_unread_count(res.id), 1)
+
+            report = notify_drive_event(drive, DRIVE_SCHEDULED)
+            self.assertEqual(resident_unread_count(res.id), 1)
+            self.assertEqual(report["residents"], 0)
+            self.assertEqual(report["suppressed"], 1)
+            self.assertEqual(get_fanout_stats()["suppressed"], before + 1)
+
+            inbox = res.view_inbox()
+            self.assertEqual(len(inbox), 1)
+            self.assertIn(f"Drive #{drive.id}", inbox[0])
+
+
+class InboxIntegrationTests(BaseIntegrationTest):
+
+    def _setup_resident(self):
+        area = admin_add_area("Sangre Grande")
+        street = admin_add_street(area.id, "Picton Road")
+        return resident_create("john", "johnpass", area.id, street.id, 123)
+
+    def test_cursor_pagination(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            for i in range(5):
+                res.receive_notif(f"msg{i}")
+
+            page1 = resident_inbox_page(res.id, limit=2)
+            self.assertEqual([n.message for n in page1], ["msg4", "msg3"])
+            self.assertIsNone(page1.prev)
+            page2 = resident_inbox_page(res.id, cursor=page1.next, limit=2)
+            self.assertEqual([n.message for n in page2], ["msg2", "msg1"])
+            page3 = resident_inbox_page(res.id, cursor=page2.next, limit=2)
+            self.assertEqual([n.message for n in page3], ["msg0"])
+            self.assertIsNone(page3.next)
+
+            back = resident_inbox_page(res.id, cursor=page3.prev, limit=2)
+            self.assertEqual([n.message for n in back], ["msg2", "msg1"])
+            back = resident_inbox_page(res.id, cursor=back.prev, limit=2)
+            self.assertEqual([n.message for n in back], ["msg4", "msg3"])
+            self.assertIsNone(back.prev)
+
+            with self.assertRaises(ValueError):
+                resident_inbox_page(res.id, cursor="not-a-cursor")
+
+    def test_unread_counter_is_maintained(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            res.receive_notif("direct")
+            notify_street(res.areaId, res.streetId, "street-wide")
+            res.update({"message": "observer"})
+            res.update({"message": "observer"})
+            self.assertEqual(resident_unread_count(res.id), 3)
+
+            first = resident_inbox_page(res.id).items[-1]
+            self.assertEqual(resident_mark_read(res.id, [first.id]), 1)
+            self.assertEqual(resident_unread_count(res.id), 2)
+            self.assertTrue(Notification.query.get(first.id).get_json()["read"])
+
+            self.assertEqual(resident_mark_read(res.id), 2)
+            self.assertEqual(resident_unread_count(res.id), 0)
+
+    def test_mark_read_rejects_non_integer_ids(self):
+        with self.app.app_context():
+            self._setup_resident()
+            client = self.app.test_client()
+            headers = {"Authorization": f"Bearer {login('john', 'johnpass')}"}
+            for ids in (["abc"], [1, None], [True], "1"):
+                resp = client.post("/resident/inbox/read", json={"ids": ids}, headers=headers)
+                self.assertEqual(resp.status_code, 422)
+                self.assertEqual(resp.get_json()["error"]["code"], "validation_error")
+            resp = client.post("/resident/inbox/read", json={"ids": [1]}, headers=headers)
+            self.assertEqual(resp.status_code, 200)
+
+    def test_prune_resyncs_unread_counter(self):
+        with self.app.app_context():
+            res = self._setup_resident()
+            for i in range(4):
+                res.receive_notif(f"msg{i}")
+            prune_notifications(keep=1)
+            self.assertEqual(resident_unread_count(res.id), 1)
+
+
+class PaginationIntegrationTests(BaseIntegrationTest):
+
+    def test_keyset_pages_walk_both_ways(self):
+        with self.app.app_context():
+            for i in range(7):
+                admin_add_area(f"Area {i}")
+            client = self.app.test_client()
+
+            seen, cursor = [], None
+            while True:
+                resp = client.get("/areas", query_string={"limit": 3, "cursor": cursor})
+                page = resp.get_json()
+                seen += [a["name"] for a in page["items"]]
+                if not page["next"]:
+                    break
+                cursor = page["next"]
+            self.assertEqual(seen, [f"Area {i}" for i in range(7)])
+
+            back = client.get("/areas", query_string={"limit": 3, "cursor": page["prev"]}).get_json()
+            self.assertEqual([a["name"] for a in back["items"]], ["Area 3", "Area 4", "Area 5"])
+
+            maximum = self.app.config.get("MAX_PAGE_SIZE")
+            self.app.config["MAX_PAGE_SIZE"] = 5
+            try:
+                resp = client.get("/areas?limit=1000")
+                self.assertEqual(len(resp.get_json()["items"]), 5)
+            finally:
+                self.app.config["MAX_PAGE_SIZE"] = maximum
+
+            resp = client.get("/areas?cursor=garbage")
+            self.assertEqual(resp.status_code, 422)
+
+
+class DriveSubscriptionTests(BaseIntegrationTest):
+
+    def test_observers_persist_and_notify_in_bulk(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            driver = admin_create_driver("steve", "stevepass")
+            future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            drive = driver_schedule_drive(driver, area.id, street.id, future_date, "11:30")
+            john = resident_create("john", "johnpass", area.id, street.id, 1)
+            mary = resident_create("mary", "marypass", area.id, street.id, 2)
+            resident_create("bob", "bobpass", area.id, street.id, 3)
+
+            john.subscribe(drive)
+            john.subscribe(drive)
+            resident_request_stop(mary, drive.id)
+            drive_id, john_id, mary_id = drive.id, john.id, mary.id
+
+            # Nothing lives on the instances: a fresh session sees the same subscribers
+            db.session.remove()
+            drive = db.session.get(Drive, drive_id)
+            self.assertEqual(DriveSubscription.subscriber_ids(drive_id), [john_id, mary_id])
+            self.assertEqual({r.username for r in drive.observers()}, {"john", "mary"})
+
+            self.assertEqual(drive.notifyObservers({"message": "Van is 5 minutes away"}), 2)
+            self.assertEqual(drive.notifyObservers({"message": "Van is 5 minutes away"}), 0)
+            self.assertEqual(resident_unread_count(john_id), 1)
+            self.assertTrue(
+                Resident.query.get(john_id).view_inbox()[-1].endswith(f"Drive #{drive_id}: Van is 5 minutes away")
+            )
+
+            resident_cancel_stop(Resident.query.get(mary_id), drive_id)
+            self.assertEqual(DriveSubscription.subscriber_ids(drive_id), [john_id])
+
+
+class InboxStreamTests(BaseIntegrationTest):
+
+    def test_stream_replays_after_last_event_id(self):
+        self.app.config["STREAM_TIMEOUT"] = 0
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            res = resident_create("john", "johnpass", area.id, street.id, 123)
+            first = res.receive_notif("first")
+            res.receive_notif("second")
+            token = login("john", "johnpass")
+
+            client = self.app.test_client()
+            resp = client.get(
+                "/resident/inbox/stream",
+                headers={"Authorization": f"Bearer {token}", "Last-Event-ID": str(first.id)}
+            )
+            body = resp.get_data(as_text=True)
+            self.assertEqual(resp.mimetype, "text/event-stream")
+            self.assertIn("second", body)
+            self.assertNotIn('"first"', body)
+
+    def test_dashboard_stream_resumes_after_the_rendered_inbox(self):
+        self.app.config["STREAM_TIMEOUT"] = 0
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            res = resident_create("john", "johnpass", area.id, street.id, 123)
+            shown = res.receive_notif("shown")
+            headers = {"Authorization": f"Bearer {login('john', 'johnpass')}"}
+            client = self.app.test_client()
+
+            page = client.get("/resident/dashboard", headers=headers).get_data(as_text=True)
+            url = f"/resident/inbox/stream?last_event_id={shown.id}"
+            self.assertIn(url, page)
+
+            # written after the page rendered, before the browser connected
+            res.receive_notif("in between")
+            body = client.get(url, headers=headers).get_data(as_text=True)
+            self.assertIn("in between", body)
+            self.assertNotIn('"shown"', body)
+
+    def test_driver_stop_feed(self):
+        self.app.config["STREAM_TIMEOUT"] = 0
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            driver = admin_create_driver("steve", "stevepass")
+            future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            drive = driver_schedule_drive(driver, area.id, street.id, future_date, "11:30")
+            res = resident_create("john", "johnpass", area.id, street.id, 123)
+            token = login("steve", "stevepass")
+            driver_id = driver.id
+
+            stop = resident_request_stop(res, drive.id)
+            stop_id = stop.id
+            driver_approve_stop(driver, stop.id)
+            resident_cancel_stop(res, drive.id)
+
+            client = self.app.test_client()
+            resp = client.get(
+                "/driver/stops/stream",
+                headers={"Authorization": f"Bearer {token}", "Last-Event-ID": "0"}
+            )
+            events = [
+                json.loads(line[len("data: "):])
+                for line in resp.get_data(as_text=True).splitlines()
+                if line.startswith("data: ")
+            ]
+            self.assertEqual(
+                [(e["event"], e["status"]) for e in events],
+                [("stop_created", "Pending"), ("stop_status", "Subscribed"), ("stop_cancelled", "Subscribed")]
+            )
+            self.assertEqual(events[0]["resident"]["username"], "john")
+            self.assertTrue(all(e["stopId"] == stop_id for e in events))
+            self.assertEqual(events[0]["resident"]["street"], "Picton Road")
+
+            # residents, their streets and areas come with the events
+            db.session.expunge_all()
+            with count_queries() as statements:
+                [e.get_json() for e in driver_stop_events_since(driver_id, 0)]
+            self.assertEqual(len(statements), 2)
+
+            # the dashboard's feed resumes from the last event it rendered
+            page = client.get("/driver/dashboard", headers={"Authorization": f"Bearer {token}"})
+            self.assertIn(f"/driver/stops/stream?last_event_id={events[-1]['id']}", page.get_data(as_text=True))
+
+    def test_broadcaster_wakes_subscribers(self):
+        hub = Broadcaster()
+        with hub.subscribe(["resident:1"]) as sub:
+            hub.publish({"resident:2"})
+            self.assertFalse(sub.wait(0))
+            hub.publish({"resident:1"})
+            self.assertTrue(sub.wait(1))
+
+    def test_socket_wakeup_crosses_processes(self):
+        directory = tempfile.mkdtemp()
+        listener = Broadcaster(SocketBus(directory))
+        publisher = Broadcaster(SocketBus(directory))
+        with listener.subscribe(["street:3"]) as sub:
+            publisher.publish({"street:3"})
+            self.assertTrue(sub.wait(2))
+
+
+class DriverDashboardQueryTests(BaseIntegrationTest):
+
+    def _dashboard_query_count(self, client, token):
+        # both counts pay for the token's identity lookup
+        clear_identity_cache()
+        with count_queries() as statements:
+            resp = client.get("/driver/dashboard", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(resp.status_code, 200)
+        return len(statements)
+
+    def _add_drive_with_stops(self, driver, area, index):
+        street = admin_add_street(area.id, f"Street {index}")
+        day = (datetime.now() + timedelta(days=index + 1)).strftime("%Y-%m-%d")
+        drive = driver_schedule_drive(driver, area.id, street.id, day, "11:30")
+        for n in range(2):
+            res = resident_create(f"res{index}_{n}", "pass", area.id, street.id, n)
+            resident_request_stop(res, drive.id)
+
+    def test_query_count_is_constant_in_the_number_of_drives(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            driver = admin_create_driver("steve", "stevepass")
+            token = login("steve", "stevepass")
+            client = self.app.test_client()
+
+            self._add_drive_with_stops(driver, area, 0)
+            with_one = self._dashboard_query_count(client, token)
+
+            for index in range(1, 5):
+                self._add_drive_with_stops(driver, area, index)
+            with_five = self._dashboard_query_count(client, token)
+
+            self.assertEqual(with_one, with_five)
+
+
+class AdminDashboardTests(BaseIntegrationTest):
+
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            db.session.add(Admin("admin", "adminpass"))
+            db.session.commit()
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            admin_create_driver("steve", "stevepass")
+            for n in range(5):
+                resident_create(f"res_{n}", "pass", area.id, street.id, n)
+            resident_create("100%_real", "pass", area.id, street.id, 9)
+
+    def test_summary_is_one_query(self):
+        with self.app.app_context():
+            with count_queries() as statements:
+                summary = admin_dashboard_summary()
+            self.assertEqual(len(statements), 1)
+            self.assertEqual(summary["areas"], 1)
+            self.assertEqual(summary["drivers"], 1)
+            self.assertEqual(summary["residents"], 6)
+
+    def test_tables_are_paged_and_searchable(self):
+        with self.app.app_context():
+            token = login("admin", "adminpass")
+            client = self.app.test_client()
+            headers = {"Authorization": f"Bearer {token}"}
+
+            resp = client.get("/admin/users?role=Resident&limit=4", headers=headers)
+            page = resp.get_json()
+            self.assertEqual(len(page["items"]), 4)
+            self.assertNotIn("inbox", page["items"][0])
+            self.assertIsNotNone(page["next"])
+
+            resp = client.get("/admin/users", query_string={"role": "Resident", "q": "RES_"}, headers=headers)
+            self.assertEqual(len(resp.get_json()["items"]), 5)
+            resp = client.get("/admin/users", query_string={"q": "0%_"}, headers=headers)
+            self.assertEqual([u["username"] for u in resp.get_json()["items"]], ["100%_real"])
+
+            resp = client.get("/admin/dashboard", headers=headers)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn(b"Pending stops", resp.data)
+
+    def test_street_filter_must_be_an_area_id(self):
+        with self.app.app_context():
+            headers = {"Authorization": f"Bearer {login('admin', 'adminpass')}"}
+            client = self.app.test_client()
+            for url, kwargs in (("/streets?area_id=abc", {}), ("/admin/streets?area_id=abc", {"headers": headers})):
+                resp = client.get(url, **kwargs)
+                self.assertEqual(resp.status_code, 422)
+                self.assertEqual(resp.get_json()["error"]["code"], "validation_error")
+                self.assertIn("area_id", resp.get_json()["error"]["message"])
+            self.assertEqual(len(client.get("/streets?area_id=").get_json()["items"]), 1)
+
+    def test_sparse_fieldsets(self):
+        with self.app.app_context():
+            token = login("admin", "adminpass")
+            client = self.app.test_client()
+            headers = {"Authorization": f"Bearer {token}"}
+            with count_queries() as statements:
+                resp = client.get("/admin/users?role=Resident&limit=2&fields=id,username,streetId", headers=headers)
+            page = resp.get_json()
+            self.assertEqual(set(page["items"][0]), {"id", "username", "streetId"})
+            self.assertIsNotNone(page["items"][0]["streetId"])
+            self.assertFalse([s for s in statements if "notification" in s])
+            resp = client.get(f"/admin/users?role=Resident&limit=2&fields=id,username,streetId&cursor={page['next']}",
+                              headers=headers)
+            self.assertEqual(len(resp.get_json()["items"]), 2)
+
+            resp = client.get("/admin/users?fields=id&format=columnar", headers=headers)
+            self.assertEqual(resp.get_json(force=True)["columns"], ["id"])
+            resp = client.get("/admin/areas?fields=name", headers=headers)
+            self.assertEqual(resp.get_json()["items"], [{"name": "Sangre Grande"}])
+            resp = client.get("/admin/users?fields=id,inbox", headers=headers)
+            self.assertEqual(resp.status_code, 422)
+            self.assertIn("inbox", resp.get_json()["error"]["message"])
+
+            users = get_all_users_json(fields=["username", "houseNumber"])
+            self.assertEqual(len(users), 8)
+            self.assertIn({"username": "res_3", "houseNumber": 3}, users)
+
+            users = serializer_for(User)
+            self.assertIs(users.only(["id", "username", "id"]), users.only(["id", "username"]))
+            self.assertEqual(users.only(["username", "id", "username"]).names, ["username", "id"])
+
+
+class LoadingProfileTests(BaseIntegrationTest):
+
+    def _statements(self, fn):
+        with count_queries() as statements:
+            fn()
+        return statements
+
+    def test_password_is_only_loaded_to_log_in(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            uid = resident_create("john", "johnpass", area.id, street.id, 1).id
+            db.session.expunge_all()
+
+            statements = self._statements(lambda: get_user(uid))
+            self.assertEqual(len(statements), 1)
+            self.assertNotIn("password", statements[0])
+
+            db.session.expunge_all()
+            statements = self._statements(lambda: self.assertIsNotNone(login("john", "johnpass")))
+            self.assertEqual(len(statements), 1)
+            self.assertIn("password", statements[0])
+
+    def test_user_lookup_includes_the_subtype(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            uid = resident_create("john", "johnpass", area.id, street.id, 7).id
+
+            db.session.expunge_all()
+            statements = self._statements(lambda: self.assertEqual(get_user(uid).houseNumber, 7))
+            self.assertEqual(len(statements), 1)
+
+            self.app.config["USER_POLYMORPHIC_LOADING"] = "joined"
+            try:
+                db.session.expunge_all()
+                statements = self._statements(lambda: self.assertEqual(get_user(uid).houseNumber, 7))
+                self.assertEqual(len(statements), 2)
+            finally:
+                self.app.config["USER_POLYMORPHIC_LOADING"] = "with_polymorphic"
+
+    def test_user_listing_is_a_projection(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            resident_create("john", "johnpass", area.id, street.id, 1)
+            page = get_users_page(role="Resident")
+            self.assertEqual(page.get_json()["items"][0], {"id": page.items[0].id, "username": "john", "type": "Resident"})
+
+
+class ReferenceCacheTests(BaseIntegrationTest):
+
+    def test_writes_in_any_worker_invalidate_the_cache(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            admin_add_street(area.id, "Main Street")
+            loads = reference_stats["loads"]
+
+            self.assertEqual([a.name for a in admin_view_all_areas()], ["Sangre Grande"])
+            self.assertEqual(len(admin_view_all_streets()), 1)
+            self.assertEqual(reference_stats["loads"], loads + 1)
+
+            admin_add_area("Arima")
+            self.assertEqual([a.name for a in admin_view_all_areas()], ["Arima", "Sangre Grande"])
+            self.assertEqual(reference_stats["loads"], loads + 2)
+
+            # another worker: its own connection, committing outside this session
+            with db.engine.begin() as conn:
+                conn.execute(db.metadata.tables["area"].insert().values(name="Tunapuna"))
+                conn.execute(db.metadata.tables["reference_version"].update().values(version="other-worker"))
+            db.session.rollback()
+            self.assertIn("Tunapuna", [a.name for a in admin_view_all_areas()])
+
+            client = self.app.test_client()
+            resp = client.get("/areas")
+            self.assertEqual(len(resp.get_json()["items"]), 3)
+            loads = reference_stats["loads"]
+            client.get("/areas")
+            client.get("/streets?area_id=%d" % area.id)
+            self.assertEqual(reference_stats["loads"], loads)
+
+
+class ConditionalGetTests(BaseIntegrationTest):
+
+    def test_etag_revalidation(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            client = self.app.test_client()
+
+            resp = client.get("/areas")
+            etag = resp.headers["ETag"]
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn("no-cache", resp.headers["Cache-Control"])
+
+            with count_queries() as statements:
+                resp = client.get("/areas", headers={"If-None-Match": etag})
+            self.assertEqual(resp.status_code, 304)
+            self.assertEqual(resp.data, b"")
+            self.assertEqual(len(statements), 1)   # the version row only
+
+            # other pages and other tables have their own tags
+            self.assertNotEqual(client.get("/areas?limit=1").headers["ETag"], etag)
+            admin_add_street(area.id, "Main Street")
+            self.assertEqual(client.get("/areas", headers={"If-None-Match": etag}).status_code, 304)
+
+            admin_add_area("Arima")
+            resp = client.get("/areas", headers={"If-None-Match": etag})
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(resp.get_json()["items"]), 2)
+
+            # only the ETag validates; a date cannot tell writes in the same second apart
+            resp = client.get("/streets", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn("Last-Modified", resp.headers)
+
+
+class StreetScheduleTests(BaseIntegrationTest):
+
+    def test_street_drives_are_bounded_cached_and_paged(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            other = admin_add_street(area.id, "Picton Road")
+            driver = admin_create_driver("steve", "stevepass")
+            day = lambda n: (datetime.now() + timedelta(days=n)).strftime("%Y-%m-%d")
+            for n in (1, 2, 3):
+                driver_schedule_drive(driver, area.id, street.id, day(n), "11:30")
+            driver_schedule_drive(driver, area.id, street.id, day(30), "11:30")
+            driver_schedule_drive(driver, area.id, other.id, day(1), "09:00")
+            cancelled = driver_schedule_drive(driver, area.id, street.id, day(2), "15:00")
+            driver_cancel_drive(driver, cancelled.id)
+
+            self.assertEqual([s.name for s in get_streets_for_area(area.id)], ["Main Street", "Picton Road"])
+            self.assertEqual(get_streets_for_area(area.id + 1), [])
+
+            drives = get_drives_for_street(street.id)
+            self.assertEqual([d.date.strftime("%Y-%m-%d") for d in drives], [day(1), day(2), day(3)])
+            self.assertEqual(len(get_drives_for_street(street.id, day(2))), 1)
+
+            with count_queries() as statements:
+                self.assertIs(get_drives_for_street(street.id), drives)
+            self.assertEqual(statements, [])
+
+            # scheduling or cancelling on the street refreshes its schedule
+            added = driver_schedule_drive(driver, area.id, street.id, day(4), "11:30")
+            self.assertEqual(len(get_drives_for_street(street.id)), 4)
+            driver_cancel_drive(driver, added.id)
+            self.assertEqual(get_drives_for_street(street.id), drives)
+
+            client = self.app.test_client()
+            page = client.get(f"/streets/{street.id}/drives?limit=2").get_json()
+            self.assertEqual([d["date"] for d in page["items"]], [day(1), day(2)])
+            page = client.get(f"/streets/{street.id}/drives?limit=2&cursor={page['next']}").get_json()
+            self.assertEqual([d["date"] for d in page["items"]], [day(3)])
+            self.assertEqual(client.get("/streets/999/drives").status_code, 404)
+            self.assertEqual(client.get(f"/streets/{street.id}/drives?date=soon").status_code, 422)
+
+
+class SerializationTests(BaseIntegrationTest):
+
+    def test_projections_match_get_json(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            driver = admin_create_driver("steve", "stevepass")
+            res = resident_create("john", "johnpass", area.id, street.id, 1)
+            drive = driver_schedule_drive(driver, area.id, street.id,
+                                          (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"), "11:30")
+            resident_request_stop(res, drive.id)
+            drain_outbox()
+
+            for model in (Drive, Stop, Notification, DriveSubscription):
+                serializer = serializer_for(model)
+                rows = db.session.execute(serializer.select().order_by(model.id)).all()
+                objects = model.query.order_by(model.id).all()
+                self.assertTrue(rows)
+                self.assertEqual(serializer.dump_all(rows), [o.get_json() for o in objects])
+
+    def test_columnar_matches_json(self):
+        with self.app.app_context():
+            db.session.add(Admin("admin", "adminpass"))
+            db.session.commit()
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Main Street")
+            driver = admin_create_driver("steve", "stevepass")
+            for day in (1, 2):
+                driver_schedule_drive(driver, area.id, street.id,
+                                      (datetime.now() + timedelta(days=day)).strftime("%Y-%m-%d"), "11:30")
+            client = self.app.test_client()
+            admin = {"Authorization": f"Bearer {login('admin', 'adminpass')}"}
+            steve = {"Authorization": f"Bearer {login('steve', 'stevepass')}"}
+
+            for url, headers in (("/admin/users", admin), ("/admin/areas", admin),
+                                 ("/admin/streets", admin), ("/driver/drives", steve)):
+                plain = client.get(url, headers=headers)
+                columnar = client.get(url, headers=dict(headers, Accept="application/vnd.breadvan.columnar+json"))
+                self.assertEqual(columnar.mimetype, "application/vnd.breadvan.columnar+json")
+                self.assertIn("Accept", columnar.headers["Vary"])
+                body = columnar.get_json(force=True)
+                items = [dict(zip(body["columns"], row)) for row in body.pop("rows")]
+                del body["columns"]
+                self.assertEqual(dict(body, items=items), plain.get_json())
+                if len(items) > 1:
+                    self.assertLess(len(columnar.data), len(plain.data))
+
+            resp = client.get("/driver/drives?format=columnar", headers=steve)
+            self.assertEqual(resp.get_json(force=True)["columns"],
+                             ["id", "driverId", "areaId", "streetId", "date", "time", "status"])
+            self.assertNotEqual(client.get("/admin/areas?format=columnar", headers=admin).headers["ETag"],
+                                client.get("/admin/areas", headers=admin).headers["ETag"])
+
+    def test_fast_json_output_is_unchanged(self):
+        with self.app.app_context():
+            admin_add_area("Sangre Grande")
+            client = self.app.test_client()
+            fast = client.get("/areas?limit=5").data
+            self.app.config["FAST_JSON"] = False
+            try:
+                self.assertEqual(client.get("/areas?limit=5").data, fast)
+            finally:
+                self.app.config["FAST_JSON"] = True
+
+
+class IdentityMemoTests(BaseIntegrationTest):
+
+    def test_token_decoded_and_user_loaded_once_per_request(self):
+        import flask_jwt_extended.view_decorators as jwt_views
+        import App.controllers.identity as identity
+
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            admin_add_street(area.id, "Main Street")
+            admin_create_driver("steve", "stevepass")
+            headers = {"Authorization": f"Bearer {login('steve', 'stevepass')}"}
+            client = self.app.test_client()
+
+            with mock.patch.object(jwt_views, "decode_token", wraps=jwt_views.decode_token) as decode, \
+                    mock.patch.object(identity, "load_user", wraps=identity.load_user) as load:
+                # the dashboard changes the driver; listing drives only needs the token's UserSnapshot
+                for url, loads in (("/driver/dashboard", 1), ("/driver/drives", 0)):
+                    decode.reset_mock()
+                    load.reset_mock()
+                    self.assertEqual(client.get(url, headers=headers).status_code, 200)
+                    self.assertEqual(decode.call_count, 1, url)
+                    self.assertEqual(load.call_count, loads, url)
+
+                # the memo is per request: no token, no user
+                self.assertEqual(client.get("/driver/drives").status_code, 401)
+                self.assertEqual(client.get("/dashboard").status_code, 401)
+
+    def test_tokens_are_cached_until_the_user_changes(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            admin_add_street(area.id, "Main Street")
+            driver = admin_create_driver("steve", "stevepass")
+            headers = {"Authorization": f"Bearer {login('steve', 'stevepass')}"}
+            client = self.app.test_client()
+            statements = []
+
+            def get(url):
+                with count_queries() as run:
+                    resp = client.get(url, headers=headers)
+                statements[:] = run
+                return resp
+
+            get("/driver/drives")
+            identity_stats = token_cache().stats
+            hits = identity_stats["hits"]
+            self.assertEqual(get("/driver/drives").status_code, 200)
+            self.assertEqual(identity_stats["hits"], hits + 1)
+            self.assertFalse([s for s in statements if 'FROM "user"' in s or "FROM user" in s])
+
+            invalidations = identity_stats["invalidations"]
+            update_user(driver.id, "steven")
+            self.assertEqual(identity_stats["invalidations"], invalidations + 1)
+            self.assertIn(b"steven", get("/driver/dashboard").data)
+
+            admin_delete_driver(driver.id)
+            self.assertEqual(get("/driver/drives").status_code, 401)
+
+        # each app keeps its own tokens
+        other = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        self.assertIsNot(other.extensions.get("identity_cache"), self.app.extensions["identity_cache"])
+
+    def test_lookup_errors_are_not_anonymous(self):
+        with self.app.app_context():
+            admin_create_driver("steve", "stevepass")
+            headers = {"Authorization": f"Bearer {login('steve', 'stevepass')}"}
+            with mock.patch("App.controllers.auth.user_snapshot", side_effect=RuntimeError("db down")):
+                with self.app.test_request_context("/driver/drives", headers=headers):
+                    with self.assertRaises(RuntimeError):
+                        current_identity()
+            with self.app.test_request_context("/driver/drives", headers={"Authorization": "Bearer nonsense"}):
+                self.assertIsNone(current_identity())
+
+
+class HotQueryIndexTests(BaseIntegrationTest):
+
+    def test_hot_queries_use_an_index(self):
+        with self.app.app_context():
+            for name, plan in explain_hot_queries():
+                self.assertTrue(any("INDEX" in line for line in plan), f"{name}: {plan}")
+
+
+class EventBusTests(unittest.TestCase):
+
+    class Recorder(Observer):
+        def __init__(self):
+            self.messages = []
+            self.received = threading.Event()
+
+        def update(self, message):
+            self.messages.append(message)
+            self.received.set()
+
+    def test_subject_reaches_observers_in_other_processes(self):
+        directory = tempfile.mkdtemp()
+        here = Subject("drive.7", SocketBus(directory))
+        there = Subject("drive.7", SocketBus(directory))
+        observer = self.Recorder()
+        there.attach(observer)
+
+        here.notify_observers({"drive_id": 7, "message": "Van is 5 minutes away"})
+        self.assertTrue(observer.received.wait(2))
+        self.assertEqual(observer.messages, [{"drive_id": 7, "message": "Van is 5 minutes away"}])
+
+    def test_subject_without_bus_is_synchronous(self):
+        subject, observer = Subject(), self.Recorder()
+        subject.attach(observer)
+        subject.notify_observers("hello")
+        self.assertEqual(observer.messages, ["hello"])
+
+    def test_app_bus_runs_observers_in_an_app_context(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        bus = app.extensions["event_bus"]
+        self.assertIs(bus.app, app)
+
+        class Counter(self.Recorder):
+            def update(self, message):
+                super().update(db.session.query(User).count())
+
+        subject, observer = Subject("drive.8", bus), Counter()
+        with app.app_context():
+            create_db()
+        subject.attach(observer)
+        subject.notify_observers({"drive_id": 8})
+        self.assertTrue(observer.received.wait(2))
+        self.assertEqual(observer.messages, [0])
+        subject.close()
+
+    def test_full_queue_pushes_back_on_publishers(self):
+        class StalledBus(InProcessBus):
+            def _send(self, batch):
+                threading.Event().wait()
+
+        bus = StalledBus(batch_size=1, max_queue=2, publish_timeout=0.05)
+        with self.assertRaises(EventBusFull):
+            for i in range(10):
+                bus.publish("drive.7", i)
+        self.assertEqual(bus.stats["rejected"], 1)
+
+    def test_benchmark_batches_events(self):
+        result = benchmark(InProcessBus(batch_size=50), events=500)
+        self.assertEqual(result["events"], 500)
+        self.assertEqual(result["dropped"], 0)
+        self.assertLessEqual(result["batches"], 500)
+
+
+class OutboxIntegrationTests(BaseIntegrationTest):
+
+    def _setup_stop(self):
+        area = admin_add_area("Sangre Grande")
+        street = admin_add_street(area.id, "Picton Road")
+        driver = admin_create_driver("steve", "stevepass")
+        res = resident_create("john", "johnpass", area.id, street.id, 123)
+        future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        drive = driver_schedule_drive(driver, area.id, street.id, future_date, "11:30")
+        stop = resident_request_stop(res, drive.id)
+        return driver, res, stop
+
+    def test_driver_action_only_writes_outbox(self):
+        with self.app.app_context():
+            driver, res, stop = self._setup_stop()
+            drain_outbox()
+            self.assertEqual(len(res.view_inbox()), 2)
+
+            driver_approve_stop(driver, stop.id, eta="10:00")
+            self.assertEqual(len(res.view_inbox()), 2)
+            self.assertEqual(OutboxMessage.query.count(), 1)
+
+            delivered, failed = drain_outbox()
+            self.assertEqual((delivered, failed), (1, 0))
+            self.assertEqual(OutboxMessage.query.count(), 0)
+            self.assertIn("APPROVED>>", res.view_inbox()[-1])
+
+    def test_drive_and_its_event_commit_together(self):
+        with self.app.app_context():
+            area = admin_add_area("Sangre Grande")
+            street = admin_add_street(area.id, "Picton Road")
+            driver = admin_create_driver("steve", "stevepass")
+            future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+            with mock.patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+                drive = driver_schedule_drive(driver, area.id, street.id, future_date, "11:30")
+                driver_cancel_drive(driver, drive.id)
+            self.assertEqual(commit.call_count, 2)
+            self.assertEqual(OutboxMessage.query.count(), 2)
+
+    def test_failed_delivery_is_retried_then_parked(self):
+        with self.app.app_context():
+            queue_resident_notification(None, "nobody to deliver to")
+            db.session.commit()
+            message = OutboxMessage.query.first()
+
+            delivered, failed = drain_outbox()
+            self.assertEqual((delivered, failed), (0, 1))
+            self.assertEqual(message.status, "Pending")
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.availableAt, datetime.now())
+
+            message.attempts = MAX_ATTEMPTS - 1
+            message.availableAt = datetime.now()
+            db.session.commit()
+            drain_outbox()
+            self.assertEqual(message.status, "Failed")
+            self.assertIsNotNone(message.lastError)
+
+
 if __name__ == "__main__":
     unittest.main()    
 
@@ -1,5 +1,6 @@
 from flask_admin.contrib.sqla import ModelView
-from flask_jwt_extended import jwt_required, current_user, unset_jwt_cookies, set_access_cookies
+from flask_jwt_extended import current_user, unset_jwt_cookies, set_access_cookies
+from App.api.security import jwt_required
 from flask_admin import Admin
 from flask import flash, redirect, url_for, request
 from App.database import db
@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
 
-from App.api.security import role_required
+from App.api.security import jwt_required, role_required
+from App.api.conditional import conditional
 from App.controllers import admin as admin_controller
 from App.controllers import resident as resident_controller
 from App.controllers import user as user_controller
+from App.controllers import notification as notification_controller
+from App.controllers import area as area_controller
+from App.controllers import street as street_controller
+from App.controllers.pagination import int_arg, page_args
+from App.serialization import page_response
 
 admin_views = Blueprint('admin_views', __name__)
 
@@ -14,9 +19,11 @@ admin_views = Blueprint('admin_views', __name__)
 @role_required('Admin')
 def list_users():
     role = request.args.get('role')
-    users = user_controller.get_all_users_json() if hasattr(user_controller, 'get_all_users_json') else []
-    # repo has no unified users listing in admin module; leave empty or hook to user.get_all_users if desired
-    return jsonify({'items': users}), 200
+    try:
+        page = user_controller.get_users_page(role=role, q=request.args.get('q'), **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
 
 
 @admin_views.route('/admin/drivers', methods=['POST'])
@@ -106,16 +113,50 @@ def delete_street(area_id, street_id):
 @admin_views.route('/admin/areas', methods=['GET'])
 @jwt_required()
 @role_required('Admin')
+@conditional('area', private=True)
 def list_areas():
-    areas = admin_controller.admin_view_all_areas()
-    items = [a.get_json() if hasattr(a, 'get_json') else a for a in (areas or [])]
-    return jsonify({'items': items}), 200
+    try:
+        page = area_controller.areas_page(q=request.args.get('q'), **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
 
 
 @admin_views.route('/admin/streets', methods=['GET'])
 @jwt_required()
 @role_required('Admin')
+@conditional('street', private=True)
 def list_streets():
-    streets = admin_controller.admin_view_all_streets()
-    items = [s.get_json() if hasattr(s, 'get_json') else s for s in (streets or [])]
-    return jsonify({'items': items}), 200
+    try:
+        area_id = int_arg(request.args, 'area_id')
+        page = street_controller.streets_page(area_id=area_id, q=request.args.get('q'), **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
+
+
+@admin_views.route('/admin/items', methods=['GET'])
+@jwt_required()
+@role_required('Admin')
+@conditional('item', private=True)
+def list_items():
+    try:
+        page = admin_controller.admin_items_page(q=request.args.get('q'), **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
+
+
+@admin_views.route('/admin/summary', methods=['GET'])
+@jwt_required()
+@role_required('Admin')
+def dashboard_summary():
+    return jsonify(admin_controller.admin_dashboard_summary()), 200
+
+
+@admin_views.route('/admin/notifications/stats', methods=['GET'])
+@jwt_required()
+@role_required('Admin')
+def notification_stats():
+    # Per-worker counters: delivered writes vs duplicates suppressed by the fan-out key
+    return jsonify(notification_controller.get_fanout_stats()), 200
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, jsonify, request, flash, send_from_directory, flash, redirect, url_for
-from flask_jwt_extended import jwt_required, current_user, unset_jwt_cookies, set_access_cookies
+from flask_jwt_extended import current_user, unset_jwt_cookies, set_access_cookies
+from App.api.security import jwt_required
 
 
 from.index import index_views
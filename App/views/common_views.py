@@ -2,34 +2,42 @@ from flask import Blueprint, request, jsonify
 from App.controllers import area as area_controller
 from App.controllers import street as street_controller
 from App.controllers import drive as drive_controller
+from App.controllers.pagination import int_arg, keyset_list, page_args
+from App.controllers.reference import cached_street
+from App.models import Drive
+from App.api.conditional import conditional
 
 common_views = Blueprint('common_views', __name__)
 
 
 @common_views.route('/areas', methods=['GET'])
+@conditional('area')
 def get_areas():
-    areas = area_controller.admin_view_all_areas() if hasattr(area_controller, 'admin_view_all_areas') else []
-    items = [a.get_json() if hasattr(a, 'get_json') else a for a in (areas or [])]
-    return jsonify({'items': items}), 200
+    try:
+        page = area_controller.areas_page(**page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return jsonify(page.get_json()), 200
 
 
 @common_views.route('/streets', methods=['GET'])
+@conditional('street')
 def get_streets():
-    area_id = request.args.get('area_id')
-    streets = []
-    if area_id and hasattr(street_controller, 'get_streets_for_area'):
-        streets = street_controller.get_streets_for_area(area_id)
-    elif hasattr(street_controller, 'admin_view_all_streets'):
-        streets = street_controller.admin_view_all_streets()
-    items = [s.get_json() if hasattr(s, 'get_json') else s for s in (streets or [])]
-    return jsonify({'items': items}), 200
+    try:
+        area_id = int_arg(request.args, 'area_id')
+        page = street_controller.streets_page(area_id=area_id, **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return jsonify(page.get_json()), 200
 
 
 @common_views.route('/streets/<int:street_id>/drives', methods=['GET'])
 def street_drives(street_id):
-    date = request.args.get('date')
-    drives = []
-    if hasattr(drive_controller, 'get_drives_for_street'):
-        drives = drive_controller.get_drives_for_street(street_id, date)
-    items = [d.get_json() if hasattr(d, 'get_json') else d for d in (drives or [])]
-    return jsonify({'items': items}), 200
+    if cached_street(street_id) is None:
+        return jsonify({'error': {'code': 'resource_not_found', 'message': 'Street not found'}}), 404
+    try:
+        drives = drive_controller.get_drives_for_street(street_id, request.args.get('date'))
+        page = keyset_list(drives, [Drive.date, Drive.time, Drive.id], **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return jsonify(page.get_json()), 200
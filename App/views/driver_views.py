@@ -1,11 +1,14 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 
 from App.views.auth import auth_views
 from App.controllers import driver as driver_controller
-from App.controllers import user as user_controller
 from App.views import user as user_views
-from App.api.security import role_required, current_user_id
+from App.api.security import jwt_required, role_required, current_user_id, authenticated_user, current_identity
+from App.realtime import event_stream
+from App.controllers.pagination import page_args
+from App.serialization import page_response
 
 driver_views = Blueprint('driver_views', __name__)
 
@@ -23,15 +26,27 @@ def me():
 @role_required('Driver')
 def list_drives():
     params = request.args
-    page = int(params.get('page', 1))
-    page_size = int(params.get('page_size', 20))
-    uid = current_user_id()
-    driver = user_controller.get_user(uid)
-    drives = driver_controller.driver_view_drives(driver)
-    total = len(drives) if drives else 0
-    start = (page - 1) * page_size
-    items = [d.get_json() if hasattr(d, 'get_json') else d for d in (drives or [])[start:start+page_size]]
-    return jsonify({'items': items, 'page': page, 'total': total}), 200
+    try:
+        date_from = datetime.strptime(params['from'], "%Y-%m-%d").date() if params.get('from') else None
+        date_to = datetime.strptime(params['to'], "%Y-%m-%d").date() if params.get('to') else None
+    except ValueError:
+        return jsonify({'error': {'code': 'validation_error', 'message': 'from and to must be YYYY-MM-DD'}}), 422
+    status = params.get('status')
+    if status == 'all':
+        statuses = None
+    elif status:
+        statuses = [s.strip() for s in status.split(',') if s.strip()]
+    else:
+        statuses = driver_controller.ACTIVE_DRIVE_STATUSES
+
+    driver = current_identity()
+    try:
+        page = driver_controller.driver_drives_page(
+            driver, statuses=statuses, date_from=date_from, date_to=date_to, **page_args(params)
+        )
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
 
 
 @driver_views.route('/driver/drives', methods=['POST'])
@@ -45,8 +60,7 @@ def create_drive():
     time = data.get('time')
     if not street_id or not date or not time:
         return jsonify({'error': {'code': 'validation_error', 'message': 'street_id, date and time required'}}), 422
-    uid = current_user_id()
-    driver = user_controller.get_user(uid)
+    driver = authenticated_user()
     drive = driver_controller.driver_schedule_drive(driver, area_id, street_id, date, time)
     out = drive.get_json() if hasattr(drive, 'get_json') else drive
     return jsonify(out), 201
@@ -56,8 +70,7 @@ def create_drive():
 @jwt_required()
 @role_required('Driver')
 def start_drive(drive_id):
-    uid = current_user_id()
-    driver = user_controller.get_user(uid)
+    driver = authenticated_user()
     driver_controller.driver_start_drive(driver, drive_id)
     return jsonify({'id': drive_id, 'status': 'started'}), 200
 
@@ -66,8 +79,7 @@ def start_drive(drive_id):
 @jwt_required()
 @role_required('Driver')
 def end_drive(drive_id):
-    uid = current_user_id()
-    driver = user_controller.get_user(uid)
+    driver = authenticated_user()
     res = driver_controller.driver_end_drive(driver)
     return jsonify({'id': getattr(res, 'id', drive_id), 'status': 'ended'}), 200
 
@@ -76,8 +88,7 @@ def end_drive(drive_id):
 @jwt_required()
 @role_required('Driver')
 def cancel_drive(drive_id):
-    uid = current_user_id()
-    driver = user_controller.get_user(uid)
+    driver = authenticated_user()
     driver_controller.driver_cancel_drive(driver, drive_id)
     return jsonify({'id': drive_id, 'status': 'cancelled'}), 200
 
@@ -86,8 +97,34 @@ def cancel_drive(drive_id):
 @jwt_required()
 @role_required('Driver')
 def requested_stops(drive_id):
+    driver = current_identity()
+    try:
+        page = driver_controller.driver_requested_stops_page(driver, drive_id, **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return page_response(page), 200
+
+
+@driver_views.route('/driver/stops/stream', methods=['GET'])
+@jwt_required()
+@role_required('Driver')
+def stops_stream():
     uid = current_user_id()
-    driver = user_controller.get_user(uid)
-    stops = driver_controller.driver_view_requested_stops(driver, drive_id)
-    items = [s.get_json() if hasattr(s, 'get_json') else s for s in (stops or [])]
-    return jsonify({'items': items}), 200
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else driver_controller.driver_latest_stop_event_id(uid)
+    except ValueError:
+        return jsonify({'error': {'code': 'validation_error', 'message': 'Last-Event-ID must be a stop event id'}}), 422
+    stream = event_stream(
+        [f"driver:{uid}"],
+        lambda after: driver_controller.driver_stop_events_since(uid, after),
+        last_id,
+        'stop',
+        heartbeat=current_app.config.get('STREAM_HEARTBEAT', 15),
+        timeout=current_app.config.get('STREAM_TIMEOUT', 300)
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 
-from App.api.security import role_required, current_user_id
+from App.api.security import jwt_required, role_required, current_user_id, authenticated_user
 from App.controllers import resident as resident_controller
-from App.controllers import user as user_controller
+from App.realtime import event_stream
+from App.controllers.pagination import page_args
 
 resident_views = Blueprint('resident_views', __name__)
 
@@ -24,8 +24,7 @@ def create_stop():
     drive_id = data.get('drive_id')
     if not drive_id:
         return jsonify({'error': {'code': 'validation_error', 'message': 'drive_id required'}}), 422
-    uid = current_user_id()
-    resident = user_controller.get_user(uid)
+    resident = authenticated_user()
     stop = resident_controller.resident_request_stop(resident, drive_id)
     out = stop.get_json() if hasattr(stop, 'get_json') else stop
     return jsonify(out), 201
@@ -35,8 +34,7 @@ def create_stop():
 @jwt_required()
 @role_required('Resident')
 def delete_stop(stop_id):
-    uid = current_user_id()
-    resident = user_controller.get_user(uid)
+    resident = authenticated_user()
     resident_controller.resident_cancel_stop(resident, stop_id)
     return '', 204
 
@@ -46,10 +44,59 @@ def delete_stop(stop_id):
 @role_required('Resident')
 def inbox():
     uid = current_user_id()
-    resident = user_controller.get_user(uid)
-    items = resident_controller.resident_view_inbox(resident)
-    items = [i.get_json() if hasattr(i, 'get_json') else i for i in (items or [])]
-    return jsonify({'items': items}), 200
+    try:
+        page = resident_controller.resident_inbox_page(uid, **page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return jsonify(page.get_json()), 200
+
+
+@resident_views.route('/resident/inbox/unread-count', methods=['GET'])
+@jwt_required()
+@role_required('Resident')
+def inbox_unread_count():
+    uid = current_user_id()
+    return jsonify({'unread': resident_controller.resident_unread_count(uid)}), 200
+
+
+@resident_views.route('/resident/inbox/read', methods=['POST'])
+@jwt_required()
+@role_required('Resident')
+def inbox_mark_read():
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list)
+                            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        return jsonify({'error': {'code': 'validation_error', 'message': 'ids must be a list of notification ids'}}), 422
+    uid = current_user_id()
+    marked = resident_controller.resident_mark_read(uid, ids)
+    return jsonify({'marked': marked, 'unread': resident_controller.resident_unread_count(uid)}), 200
+
+
+@resident_views.route('/resident/inbox/stream', methods=['GET'])
+@jwt_required()
+@role_required('Resident')
+def inbox_stream():
+    uid = current_user_id()
+    resident = authenticated_user()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_id = int(last_event_id) if last_event_id else resident_controller.resident_latest_notification_id(uid)
+    except ValueError:
+        return jsonify({'error': {'code': 'validation_error', 'message': 'Last-Event-ID must be a notification id'}}), 422
+    stream = event_stream(
+        [f"resident:{uid}", f"street:{resident.streetId}"],
+        lambda after: resident_controller.resident_notifications_since(uid, after),
+        last_id,
+        'notification',
+        heartbeat=current_app.config.get('STREAM_HEARTBEAT', 15),
+        timeout=current_app.config.get('STREAM_TIMEOUT', 300)
+    )
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @resident_views.route('/resident/driver-stats', methods=['GET'])
@@ -60,8 +107,7 @@ def driver_stats():
     driver_id = params.get('driver_id')
     if not driver_id:
         return jsonify({'error': {'code': 'validation_error', 'message': 'driver_id is required'}}), 422
-    uid = current_user_id()
-    resident = user_controller.get_user(uid)
+    resident = authenticated_user()
     try:
         stats = resident_controller.resident_view_driver_stats(resident, int(driver_id))
     except ValueError as e:
@@ -9,6 +9,8 @@ from App.controllers import (
     get_all_users_json,
     jwt_required
 )
+from App.controllers.user import get_users_page
+from App.controllers.pagination import page_args
 
 user_views = Blueprint('user_views', __name__, template_folder='../templates')
 
@@ -26,8 +28,11 @@ def create_user_action():
 
 @user_views.route('/api/users', methods=['GET'])
 def get_users_action():
-    users = get_all_users_json()
-    return jsonify(users)
+    try:
+        page = get_users_page(**page_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': {'code': 'validation_error', 'message': str(e)}}), 422
+    return jsonify(page.get_json())
 
 @user_views.route('/api/users', methods=['POST'])
 def create_user_endpoint():
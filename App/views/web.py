@@ -1,10 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_jwt_extended import (
     set_access_cookies,
-    unset_jwt_cookies,
-    jwt_required,
-    get_jwt_identity
+    unset_jwt_cookies
 )
+from App.api.security import jwt_required, authenticated_user, current_identity
 import datetime
 from collections import defaultdict
 from App.database import db
@@ -14,7 +13,8 @@ from App.controllers.driver import (
     driver_view_drives,
     driver_start_drive,
     driver_end_drive,
-    driver_view_requested_stops,
+    driver_requested_stops_by_drive,
+    driver_latest_stop_event_id,
     driver_approve_stop,      
     driver_reject_stop,
     driver_view_stock,
@@ -25,11 +25,14 @@ from App.controllers.resident import (
     resident_cancel_stop,
     resident_request_stop,
 )
-from App.models import Area, Street, Driver, Resident, Item, User, Admin, Drive, Stop, DriverStock
-from App.controllers.admin import admin_create_driver
-from App.controllers.resident import resident_create, resident_view_inbox
-from App.controllers import login as login_controller, get_user
+from App.models import Area, Street, Driver, Resident, Item, User, Admin, Drive, Stop, DriverStock, StopEvent
+from App.models.stop_event import STOP_STATUS
+from App.controllers.admin import admin_create_driver, admin_dashboard_summary
+from App.controllers.resident import resident_create, resident_view_inbox, resident_view_inbox_with_last_id
+from App.controllers import login as login_controller
 from App.controllers.user import user_login, user_logout
+from App.controllers.outbox import queue_resident_notification
+from App.controllers.reference import cached_areas, cached_area, cached_streets, cached_street
 from App.models import Area, Street, Driver, Resident, Item
 
 web_views = Blueprint("web_views", __name__, template_folder="../templates")
@@ -72,12 +75,9 @@ def login():
 @web_views.route("/web/logout")
 @jwt_required(optional=True)
 def logout():
-    identity = get_jwt_identity()
-    if identity:
-        user = get_user(identity)
-        if user:
-            
-            user_logout(user)
+    user = authenticated_user()
+    if user:
+        user_logout(user)
 
     resp = redirect(url_for("web_views.login"))
     unset_jwt_cookies(resp)
@@ -90,8 +90,7 @@ def logout():
 @web_views.route("/dashboard")
 @jwt_required()
 def dashboard():
-    uid = get_jwt_identity()
-    user = get_user(uid)
+    user = current_identity()
     if not user:
         flash("User not found.", "error")
         return redirect(url_for("web_views.login"))
@@ -112,33 +111,23 @@ def dashboard():
 @web_views.route("/admin/dashboard")
 @jwt_required()
 def admin_dashboard():
-    uid = get_jwt_identity()
-    user = get_user(uid)
+    user = current_identity()
     if not user or user.type != "Admin":
         flash("Unauthorized.", "error")
         return redirect(url_for("web_views.login"))
 
-    areas = Area.query.all()
-    streets = Street.query.all()
-    items = Item.query.all()
-    drivers = Driver.query.all()
-    residents = Resident.query.all()
-
+    # Counts only; the tables and the area/street pickers page themselves in
+    # from the /admin/* JSON endpoints as they are opened or searched
     return render_template(
         "admin/dashboard.html",
         current_user=user,
-        areas=areas,
-        streets=streets,
-        items=items,
-        drivers=drivers,
-        residents=residents,
+        summary=admin_dashboard_summary(),
     )
 
 @web_views.route("/admin/create-driver", methods=["POST"])
 @jwt_required()
 def admin_create_driver_view():
-    uid = get_jwt_identity()
-    admin = get_user(uid)
+    admin = authenticated_user()
     if not admin or admin.type != "Admin":
         flash("Unauthorized.", "error")
         return redirect(url_for("web_views.login"))
@@ -161,8 +150,7 @@ def admin_create_driver_view():
 @web_views.route("/admin/create-resident", methods=["POST"])
 @jwt_required()
 def admin_create_resident_view():
-    uid = get_jwt_identity()
-    admin = get_user(uid)
+    admin = authenticated_user()
     if not admin or admin.type != "Admin":
         flash("Unauthorized.", "error")
         return redirect(url_for("web_views.login"))
@@ -199,8 +187,7 @@ def admin_create_resident_view():
 @web_views.route("/driver/dashboard", methods=["GET", "POST"])
 @jwt_required()
 def driver_dashboard():
-    uid = get_jwt_identity()
-    driver = get_user(uid)
+    driver = authenticated_user()
 
     if not driver or driver.type != "Driver":
         flash("Unauthorized.", "error")
@@ -219,28 +206,14 @@ def driver_dashboard():
                 flash("Please fill in date, time, area and street.", "error")
             else:
                 try:
-                    new_drive = driver_schedule_drive(
+                    # driver_schedule_drive does the (idempotent) street fan-out
+                    driver_schedule_drive(
                         driver,
                         area_id,
                         street_id,
                         date_str,
                         time_str
                     )
-
-                    residents = Resident.query.filter_by(
-                        areaId=area_id,
-                        streetId=street_id
-                    ).all()
-
-                    for r in residents:
-                        r.receive_notif(
-                            f"[Drive #{new_drive.id}] New bread van drive by "
-                            f"{driver.username} scheduled to {r.street.name}, {r.area.name} "
-                            f"on {date_str} at {time_str}. "
-                            f"Login to request a stop and view the menu."
-                        )
-
-                    db.session.commit()
                     flash("Drive scheduled and residents notified.", "success")
 
                 except ValueError as e:
@@ -254,10 +227,12 @@ def driver_dashboard():
                 flash("Could not approve that stop.", "error")
             else:
                 stop.status = "Approved"
-                stop.resident.receive_notif(
+                queue_resident_notification(
+                    stop.residentId,
                     f"Your request for drive #{stop.driveId} has been approved "
                     f"by {driver.username}."
                 )
+                StopEvent.record(stop, STOP_STATUS)
                 db.session.commit()
                 flash("Stop approved.", "success")
 
@@ -269,10 +244,12 @@ def driver_dashboard():
                 flash("Could not reject that stop.", "error")
             else:
                 stop.status = "Rejected"
-                stop.resident.receive_notif(
+                queue_resident_notification(
+                    stop.residentId,
                     f"Your request for drive #{stop.driveId} was rejected by "
                     f"{driver.username}."
                 )
+                StopEvent.record(stop, STOP_STATUS)
                 db.session.commit()
                 flash("Stop rejected.", "success")
 
@@ -303,7 +280,7 @@ def driver_dashboard():
                         + " | ".join(parts)
                     )
 
-                    res.receive_notif(msg)
+                    queue_resident_notification(res.id, msg)
                     db.session.commit()
                     flash("Update sent to resident.", "success")
 
@@ -357,19 +334,15 @@ def driver_dashboard():
                 db.session.commit()
                 flash("Item removed from your menu.", "success")
 
-    areas = Area.query.order_by(Area.name).all()
-    streets = Street.query.order_by(Street.name).all()
+    areas = cached_areas()
+    streets = cached_streets()
 
-    all_drives = driver_view_drives(driver)
-    drives = [
-        d for d in all_drives
-        if d.status in ("Upcoming", "In Progress")
-    ]
+    # Read before the stops: the live feed replays anything newer than the page
+    last_stop_event_id = driver_latest_stop_event_id(driver.id)
+    drives = driver_view_drives(driver)
 
-    stops_by_drive = defaultdict(list)
-    for d in drives:
-        for st in driver_view_requested_stops(driver, d.id):
-            stops_by_drive[d.id].append(st)
+    # One batched load for every drive's stops (and their residents)
+    stops_by_drive = driver_requested_stops_by_drive(driver, [d.id for d in drives])
 
     stocks = driver_view_stock(driver)
 
@@ -378,15 +351,16 @@ def driver_dashboard():
         driver=driver,
         areas=areas,
         streets=streets,
+        area_names={a.id: a.name for a in areas},
         drives=drives,
         stops_by_drive=stops_by_drive,
         stocks=stocks,
+        last_stop_event_id=last_stop_event_id,
     )
 @web_views.route("/resident/dashboard", methods=["GET", "POST"])
 @jwt_required()
 def resident_dashboard():
-    uid = get_jwt_identity()
-    resident = get_user(uid)
+    resident = authenticated_user()
 
     if not resident or resident.type != "Resident":
         flash("Unauthorized.", "error")
@@ -419,10 +393,10 @@ def resident_dashboard():
                 except ValueError as e:
                     flash(str(e), "error")
 
-    area = Area.query.get(resident.areaId) if resident.areaId else None
-    street = Street.query.get(resident.streetId) if resident.streetId else None
+    area = cached_area(resident.areaId) if resident.areaId else None
+    street = cached_street(resident.streetId) if resident.streetId else None
 
-    inbox = resident_view_inbox(resident)
+    inbox, last_notification_id = resident_view_inbox_with_last_id(resident)
 
     upcoming_drives = Drive.query.filter_by(
         areaId=resident.areaId,
@@ -449,6 +423,7 @@ def resident_dashboard():
         area=area,
         street=street,
         inbox=inbox,
+        last_notification_id=last_notification_id,
         upcoming_drives=upcoming_drives,
         resident_stops_by_drive=resident_stops_by_drive,
         driver_menus=driver_menus,
@@ -457,8 +432,7 @@ def resident_dashboard():
 @web_views.route("/driver/approve_stop/<int:stop_id>", methods=["POST"])
 @jwt_required()
 def approve_stop(stop_id):
-    uid = get_jwt_identity()
-    driver = get_user(uid)
+    driver = authenticated_user()
     if not driver or driver.type != "Driver":
         flash("Unauthorized.", "error")
         return redirect(url_for("web_views.login"))
@@ -478,8 +452,7 @@ def approve_stop(stop_id):
 @web_views.route("/driver/reject_stop/<int:stop_id>", methods=["POST"])
 @jwt_required()
 def reject_stop(stop_id):
-    uid = get_jwt_identity()
-    driver = get_user(uid)
+    driver = authenticated_user()
     if not driver or driver.type != "Driver":
         flash("Unauthorized.", "error")
         return redirect(url_for("web_views.login"))
@@ -1,9 +1,10 @@
 # gunicorn_config.py
 import multiprocessing
+import os
 
 # The socket to bind.
-# "0.0.0.0" to bind to all interfaces. 8000 is the port number.
-bind = "0.0.0.0:8080"
+# "0.0.0.0" to bind to all interfaces; the port comes from $PORT (Render), else 8080.
+bind = "0.0.0.0:" + os.environ.get("PORT", "8080")
 
 # The number of worker processes for handling requests.
 workers = 4
@@ -0,0 +1,50 @@
+"""composite indexes for the hot query shapes
+
+Revision ID: 1b7d5e3c9a40
+Revises: 9c4e2f71b8d0
+Create Date: 2026-10-18 15:26:09.347712
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7d5e3c9a40'
+down_revision = '9c4e2f71b8d0'
+branch_labels = None
+depends_on = None
+
+
+HOT_INDEXES = [
+    ('ix_drive_area_street_status', 'drive', ['areaId', 'streetId', 'status']),
+    ('ix_drive_driver_status', 'drive', ['driverId', 'status']),
+    ('ix_stop_drive_resident', 'stop', ['driveId', 'residentId']),
+    ('ix_driver_stock_driver_item', 'driver_stock', ['driverId', 'itemId']),
+    ('ix_resident_area_street', 'resident', ['areaId', 'streetId']),
+]
+
+
+def upgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction, and does not lock out writes
+        with context.autocommit_block():
+            for name, table, columns in HOT_INDEXES:
+                op.create_index(name, table, columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in HOT_INDEXES:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        with context.autocommit_block():
+            for name, table, _ in reversed(HOT_INDEXES):
+                op.drop_index(name, table_name=table,
+                              postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in reversed(HOT_INDEXES):
+            op.drop_index(name, table_name=table)
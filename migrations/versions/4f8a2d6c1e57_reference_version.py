@@ -0,0 +1,31 @@
+"""reference data version row
+
+Revision ID: 4f8a2d6c1e57
+Revises: 1b7d5e3c9a40
+Create Date: 2026-10-18 16:41:09.204113
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2d6c1e57'
+down_revision = '1b7d5e3c9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    reference_version = op.create_table('reference_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(reference_version, [{'id': 1, 'version': uuid.uuid4().hex}])
+
+
+def downgrade():
+    op.drop_table('reference_version')
@@ -0,0 +1,33 @@
+"""idempotency key for drive fan-out notifications
+
+Revision ID: 5d1c8e0b7f42
+Revises: a962627ddc94
+Create Date: 2026-10-18 10:03:12.274115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1c8e0b7f42'
+down_revision = 'a962627ddc94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.add_column(sa.Column('driveId', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('event', sa.String(length=20), nullable=True))
+        batch_op.create_foreign_key('fk_notification_drive', 'drive', ['driveId'], ['id'])
+        batch_op.create_index('uq_notification_resident_drive_event',
+                              ['residentId', 'driveId', 'event'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.drop_index('uq_notification_resident_drive_event')
+        batch_op.drop_constraint('fk_notification_drive', type_='foreignkey')
+        batch_op.drop_column('event')
+        batch_op.drop_column('driveId')
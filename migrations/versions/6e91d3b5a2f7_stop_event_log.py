@@ -0,0 +1,39 @@
+"""stop event log
+
+Revision ID: 6e91d3b5a2f7
+Revises: f2a7c4d90e13
+Create Date: 2026-10-18 13:12:40.118265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e91d3b5a2f7'
+down_revision = 'f2a7c4d90e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stop_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('driverId', sa.Integer(), nullable=False),
+    sa.Column('driveId', sa.Integer(), nullable=False),
+    sa.Column('stopId', sa.Integer(), nullable=False),
+    sa.Column('residentId', sa.Integer(), nullable=False),
+    sa.Column('event', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('createdAt', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['driverId'], ['driver.id'], ),
+    sa.ForeignKeyConstraint(['driveId'], ['drive.id'], ),
+    sa.ForeignKeyConstraint(['residentId'], ['resident.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stop_event_driver', 'stop_event', ['driverId', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stop_event_driver', table_name='stop_event')
+    op.drop_table('stop_event')
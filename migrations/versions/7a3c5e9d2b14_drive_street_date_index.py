@@ -0,0 +1,23 @@
+"""index for a street's upcoming drives by date
+
+Revision ID: 7a3c5e9d2b14
+Revises: d61b9e0f3a28
+Create Date: 2026-10-18 18:05:12.640218
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e9d2b14'
+down_revision = 'd61b9e0f3a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_drive_street_status_date', 'drive', ['streetId', 'status', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_drive_street_status_date', table_name='drive')
@@ -0,0 +1,30 @@
+"""content-hash dedup key for notifications
+
+Revision ID: 8b0f3e6a51c9
+Revises: c37e4a19d2b6
+Create Date: 2026-10-18 11:20:08.117052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b0f3e6a51c9'
+down_revision = 'c37e4a19d2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows keep a NULL key: they never took part in dedup and may contain duplicates
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.add_column(sa.Column('dedupKey', sa.String(length=64), nullable=True))
+        batch_op.create_index('uq_notification_resident_dedup',
+                              ['residentId', 'dedupKey'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.drop_index('uq_notification_resident_dedup')
+        batch_op.drop_column('dedupKey')
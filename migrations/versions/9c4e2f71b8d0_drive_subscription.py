@@ -0,0 +1,44 @@
+"""drive subscription registry
+
+Revision ID: 9c4e2f71b8d0
+Revises: 6e91d3b5a2f7
+Create Date: 2026-10-18 14:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2f71b8d0'
+down_revision = '6e91d3b5a2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('drive_subscription',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('driveId', sa.Integer(), nullable=False),
+    sa.Column('residentId', sa.Integer(), nullable=False),
+    sa.Column('createdAt', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['driveId'], ['drive.id'], ),
+    sa.ForeignKeyConstraint(['residentId'], ['resident.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_drive_subscription_drive_resident', 'drive_subscription',
+                    ['driveId', 'residentId'], unique=True)
+    op.create_index('ix_drive_subscription_resident', 'drive_subscription',
+                    ['residentId'], unique=False)
+
+    # Residents with a stop request are subscribed to that drive
+    op.execute(
+        'INSERT INTO drive_subscription ("driveId", "residentId", "createdAt") '
+        'SELECT DISTINCT "driveId", "residentId", CURRENT_TIMESTAMP FROM stop'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_drive_subscription_resident', table_name='drive_subscription')
+    op.drop_index('uq_drive_subscription_drive_resident', table_name='drive_subscription')
+    op.drop_table('drive_subscription')
@@ -0,0 +1,99 @@
+"""move resident inbox into notification table
+
+Revision ID: a962627ddc94
+Revises: ae418cf492c4
+Create Date: 2026-10-18 09:12:40.511203
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a962627ddc94'
+down_revision = 'ae418cf492c4'
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_FORMAT = "%Y:%m:%d:%H:%M:%S"
+MAX_INBOX_SIZE = 20
+
+resident_table = sa.table(
+    'resident',
+    sa.column('id', sa.Integer),
+    sa.column('inbox', sa.JSON),
+)
+
+notification_table = sa.table(
+    'notification',
+    sa.column('id', sa.Integer),
+    sa.column('residentId', sa.Integer),
+    sa.column('message', sa.Text),
+    sa.column('createdAt', sa.DateTime),
+)
+
+
+def _parse_entry(entry, fallback):
+    # Old inbox entries look like "[YYYY:mm:dd:HH:MM:SS]: message"
+    if entry.startswith("[") and "]: " in entry:
+        stamp, message = entry[1:].split("]: ", 1)
+        try:
+            return datetime.strptime(stamp, TIMESTAMP_FORMAT), message
+        except ValueError:
+            pass
+    return fallback, entry
+
+
+def upgrade():
+    op.create_table('notification',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('residentId', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('createdAt', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['residentId'], ['resident.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_resident_created', 'notification',
+                    ['residentId', 'createdAt'], unique=False)
+
+    # Backfill: one row per existing inbox entry, oldest first
+    conn = op.get_bind()
+    now = datetime.now()
+    rows = []
+    for resident_id, inbox in conn.execute(sa.select(resident_table.c.id, resident_table.c.inbox)):
+        for entry in inbox or []:
+            created_at, message = _parse_entry(str(entry), now)
+            rows.append({'residentId': resident_id, 'message': message, 'createdAt': created_at})
+    if rows:
+        op.bulk_insert(notification_table, rows)
+
+    with op.batch_alter_table('resident') as batch_op:
+        batch_op.drop_column('inbox')
+
+
+def downgrade():
+    with op.batch_alter_table('resident') as batch_op:
+        batch_op.add_column(sa.Column('inbox', sa.JSON(), nullable=True))
+
+    conn = op.get_bind()
+    inboxes = {}
+    query = sa.select(
+        notification_table.c.residentId,
+        notification_table.c.message,
+        notification_table.c.createdAt,
+    ).order_by(notification_table.c.createdAt, notification_table.c.id)
+    for resident_id, message, created_at in conn.execute(query):
+        entries = inboxes.setdefault(resident_id, [])
+        entries.append(f"[{created_at.strftime(TIMESTAMP_FORMAT)}]: {message}")
+
+    for resident_id, entries in inboxes.items():
+        conn.execute(
+            resident_table.update()
+            .where(resident_table.c.id == resident_id)
+            .values(inbox=entries[-MAX_INBOX_SIZE:])
+        )
+
+    op.drop_index('ix_notification_resident_created', table_name='notification')
+    op.drop_table('notification')
@@ -0,0 +1,39 @@
+"""notification outbox
+
+Revision ID: c37e4a19d2b6
+Revises: 5d1c8e0b7f42
+Create Date: 2026-10-18 10:41:55.903417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c37e4a19d2b6'
+down_revision = '5d1c8e0b7f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('availableAt', sa.DateTime(), nullable=False),
+    sa.Column('claimedBy', sa.String(length=64), nullable=True),
+    sa.Column('claimedAt', sa.DateTime(), nullable=True),
+    sa.Column('lastError', sa.Text(), nullable=True),
+    sa.Column('createdAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_status_available', 'notification_outbox',
+                    ['status', 'availableAt'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outbox_status_available', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -0,0 +1,45 @@
+"""per-table reference versions for ETags
+
+Revision ID: d61b9e0f3a28
+Revises: 4f8a2d6c1e57
+Create Date: 2026-10-18 17:22:45.871530
+
+"""
+import uuid
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61b9e0f3a28'
+down_revision = '4f8a2d6c1e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reference_version', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('areaVersion', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('streetVersion', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('itemVersion', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('updatedAt', sa.DateTime(), nullable=True))
+
+    reference_version = sa.table('reference_version',
+        sa.column('id', sa.Integer), sa.column('areaVersion', sa.String),
+        sa.column('streetVersion', sa.String), sa.column('itemVersion', sa.String),
+        sa.column('updatedAt', sa.DateTime))
+    version = uuid.uuid4().hex
+    op.execute(reference_version.update().where(reference_version.c.id == 1).values(
+        areaVersion=version, streetVersion=version, itemVersion=version,
+        updatedAt=datetime.now(timezone.utc).replace(tzinfo=None)
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('reference_version', schema=None) as batch_op:
+        batch_op.drop_column('updatedAt')
+        batch_op.drop_column('itemVersion')
+        batch_op.drop_column('streetVersion')
+        batch_op.drop_column('areaVersion')
@@ -0,0 +1,38 @@
+"""notification read state and maintained unread counter
+
+Revision ID: f2a7c4d90e13
+Revises: 8b0f3e6a51c9
+Create Date: 2026-10-18 12:05:37.640981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c4d90e13'
+down_revision = '8b0f3e6a51c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.add_column(sa.Column('readAt', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('resident') as batch_op:
+        batch_op.add_column(sa.Column('unreadCount', sa.Integer(), nullable=False, server_default='0'))
+
+    # Everything delivered so far starts out unread
+    op.execute(
+        'UPDATE resident SET "unreadCount" = '
+        '(SELECT COUNT(*) FROM notification WHERE notification."residentId" = resident.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('resident') as batch_op:
+        batch_op.drop_column('unreadCount')
+
+    with op.batch_alter_table('notification') as batch_op:
+        batch_op.drop_column('readAt')
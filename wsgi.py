@@ -1,4 +1,4 @@
-import click, pytest, sys
+import click, os, pytest, sys, tempfile, time
 from flask.cli import with_appcontext, AppGroup
 
 from datetime import datetime, timedelta
@@ -23,10 +23,11 @@ from App.controllers.admin import (
 from App.controllers.driver import (
     driver_schedule_drive,
     driver_cancel_drive,
-    driver_view_drives,
+    driver_drives_page,
     driver_start_drive,
     driver_end_drive,
-    driver_view_requested_stops
+    driver_view_requested_stops,
+    ACTIVE_DRIVE_STATUSES
 )
 from App.controllers.resident import (
     resident_create,
@@ -40,6 +41,14 @@ from App.controllers.user import (
     user_logout,
     user_view_street_drives
 )
+from App.controllers.notification import prune_notifications, prune_stop_events
+from App.controllers.outbox import drain_outbox
+from App.models.resident import MAX_INBOX_SIZE
+from App.patterns.event_bus import create_event_bus, benchmark as bus_benchmark
+from App.controllers.reference import cached_areas, cached_area, cached_streets, cached_street
+from App.controllers.diagnostics import explain_hot_queries
+from App.diagnostics.bench import (benchmark_resident_listing, benchmark_user_inheritance,
+                                   benchmark_serialization)
 
 # This commands file allow you to create convenient CLI commands for testing controllers
 
@@ -62,6 +71,44 @@ def migrate_upgrade_command():
     click.echo("Database migrations applied.")
 
 
+@app.cli.command("db-explain-hot", help="Print the query plan of each hot query shape")
+@with_appcontext
+def explain_hot_command():
+    for name, plan in explain_hot_queries():
+        print(f"\n{name}")
+        print("-" * 70)
+        for line in plan:
+            print(f"  {line}")
+
+
+@app.cli.command("db-bench-loading", help="Compare the user loading profiles on a scratch database")
+@click.option("--residents", default=10000, show_default=True, help="Residents to list")
+def bench_loading_command(residents):
+    print(f"{'Profile':<32} {'Seconds':>8} {'Peak MB':>8}")
+    print("-" * 50)
+    for name, seconds, peak in benchmark_resident_listing(residents):
+        print(f"{name:<32} {seconds:>8} {peak:>8}")
+
+
+@app.cli.command("db-bench-inheritance", help="Compare user inheritance layouts on the login and identity-lookup paths")
+@click.option("--users", default=5000, show_default=True, help="Users in the scratch database")
+@click.option("--lookups", default=2000, show_default=True, help="Lookups timed per layout and path")
+def bench_inheritance_command(users, lookups):
+    print(f"{'Layout':<18} {'Path':<16} {'us/lookup':>10} {'Queries':>8}")
+    print("-" * 55)
+    for layout, path, micros, queries in benchmark_user_inheritance(users, lookups):
+        print(f"{layout:<18} {path:<16} {micros:>10} {queries:>8}")
+
+
+@app.cli.command("db-bench-serialize", help="Compare list endpoint serialization, before and after projections")
+@click.option("--rows", default=10000, show_default=True, help="Rows of each model to serialize")
+def bench_serialize_command(rows):
+    print(f"{'Model':<14} {'Path':<40} {'Objects/s':>10}")
+    print("-" * 66)
+    for model, path, per_second in benchmark_serialization(rows):
+        print(f"{model:<14} {path:<40} {per_second:>10}")
+
+
 @app.cli.command("seed-admin", help="Create default admin user if not exists")
 @with_appcontext
 def seed_admin_command():
@@ -120,7 +167,7 @@ def view_street_drives_command():
         print("Must be logged in to perform this action.")
         return
 
-    areas = Area.query.all()
+    areas = cached_areas()
     if not areas:
         print("No areas available. Please create an area first.")
         return
@@ -135,7 +182,7 @@ def view_street_drives_command():
         return
     chosen_area = areas[chosen_area_index - 1]
 
-    streets = Street.query.filter_by(areaId=chosen_area.id).all()
+    streets = cached_streets(chosen_area.id)
     if not streets:
         print(
             "No streets available in the selected area. Please create a street first."
@@ -341,7 +388,7 @@ def schedule_drive_command(date_str, time_str):
     if not driver:
         return
     # Area/street selection logic remains in CLI for user prompts
-    areas = Area.query.all()
+    areas = cached_areas()
     if not areas:
         print("No areas available. Please create an area first.")
         return
@@ -353,7 +400,7 @@ def schedule_drive_command(date_str, time_str):
         print("Invalid area choice.")
         return
     chosen_area = areas[chosen_area_index - 1]
-    streets = Street.query.filter_by(areaId=chosen_area.id).all()
+    streets = cached_streets(chosen_area.id)
     if not streets:
         print("No streets available in the selected area. Please create a street first.")
         return
@@ -381,22 +428,39 @@ def cancel_drive_command(drive_id):
     print(f"Drive {drive_id} cancelled.")
 
 @driver_cli.command("view_my_drives", help="View driver's scheduled drives")
-def view_drives_command():
+@click.option("--status", default=None, help="Comma-separated statuses, or 'all' (default: Upcoming,In Progress)")
+@click.option("--cursor", default=None, help="Cursor printed at the end of the previous page")
+@click.option("--limit", default=20, show_default=True, help="Drives per page")
+def view_drives_command(status, cursor, limit):
     driver = require_driver()
     if not driver:
         return
-    drives = driver_view_drives(driver)
-    if not drives:
+    if status == "all":
+        statuses = None
+    elif status:
+        statuses = [s.strip() for s in status.split(",") if s.strip()]
+    else:
+        statuses = ACTIVE_DRIVE_STATUSES
+    try:
+        page = driver_drives_page(driver, cursor=cursor, limit=limit, statuses=statuses)
+    except ValueError as e:
+        print(str(e))
+        return
+    if not page.items:
         print("No scheduled drives.")
         return
-    print("\nYour Scheduled Drives:")
+    print(f"\nYour Scheduled Drives ({page.total} total):")
     print("-" * 70)
     print(f"{'Drive ID':<10} {'Date':<12} {'Time':<8} {'Area':<20} {'Street':<20}")
     print("-" * 70)
-    for drive in drives:
+    for drive in page.items:
         date_str = drive.date.strftime("%Y-%m-%d")
         time_str = drive.time.strftime("%H:%M")
-        print(f"{drive.id:<10} {date_str:<12} {time_str:<8} {drive.area.name:<20} {drive.street.name:<20}")
+        area, street = cached_area(drive.areaId), cached_street(drive.streetId)
+        print(f"{drive.id:<10} {date_str:<12} {time_str:<8} {area.name if area else '':<20} "
+              f"{street.name if street else '':<20}")
+    if page.next:
+        print(f"More: flask driver view_my_drives --cursor {page.next}")
     print("\n")
 
 @driver_cli.command("start_drive", help="Start a drive")
@@ -448,7 +512,7 @@ resident_cli = AppGroup('resident', help='Resident object commands')
 @click.argument("username")
 @click.argument("password")
 def create_resident_command(username, password):
-    areas = Area.query.all()
+    areas = cached_areas()
     if not areas:
         print("No areas available. Please create an area first.")
         return
@@ -460,7 +524,7 @@ def create_resident_command(username, password):
         print("Invalid area choice.")
         return
     chosen_area = areas[chosen_area_index - 1]
-    streets = Street.query.filter_by(areaId=chosen_area.id).all()
+    streets = cached_streets(chosen_area.id)
     if not streets:
         print("No streets available in the selected area. Please create a street first.")
         return
@@ -537,11 +601,11 @@ def view_driver_stats_command(driver_id):
         if driver.status == "Offline":
             print(f"Driver {driver.username} is currently offline.")
         elif driver.status == "Available":
-            area = Area.query.get(driver.areaId)
+            area = cached_area(driver.areaId)
             print(f"Driver {driver.username} is currently available at {area.name}")
         elif driver.status == "Busy":
-            area = Area.query.get(driver.areaId)
-            street = Street.query.get(driver.streetId)
+            area = cached_area(driver.areaId)
+            street = cached_street(driver.streetId)
             print(f"Driver {driver.username} is currently on a drive at {street.name}, {area.name}")
     except ValueError as e:
         print(str(e))
@@ -549,6 +613,77 @@ def view_driver_stats_command(driver_id):
 
 app.cli.add_command(resident_cli)
 
+# Notification Commands
+##################################################################################
+notifications_cli = AppGroup('notifications', help='Notification maintenance commands')
+
+
+@notifications_cli.command("prune", help="Apply the inbox retention policy")
+@click.option("--keep", default=MAX_INBOX_SIZE, show_default=True, help="Newest notifications kept per resident")
+@click.option("--days", type=int, default=None, help="Also drop notifications older than this many days")
+@click.option("--stop-event-days", default=7, show_default=True, help="Drop driver stop-feed events older than this many days")
+def prune_notifications_command(keep, days, stop_event_days):
+    removed = prune_notifications(keep=keep, older_than_days=days)
+    print(f"Pruned {removed} notification(s).")
+    removed = prune_stop_events(older_than_days=stop_event_days)
+    print(f"Pruned {removed} stop event(s).")
+
+
+@notifications_cli.command("worker", help="Deliver queued notifications from the outbox")
+@click.option("--batch-size", default=100, show_default=True, help="Outbox rows claimed per batch")
+@click.option("--interval", default=1.0, show_default=True, help="Seconds to sleep when the outbox is empty")
+@click.option("--once", is_flag=True, help="Drain what is currently queued, then exit")
+def notifications_worker_command(batch_size, interval, once):
+    print("Notification worker started.")
+    while True:
+        try:
+            delivered, failed = drain_outbox(batch_size=batch_size)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Worker error: {e}")
+            delivered = failed = 0
+        if delivered or failed:
+            print(f"Delivered {delivered}, failed {failed}.")
+            continue
+        if once:
+            break
+        db.session.remove()
+        time.sleep(interval)
+
+
+app.cli.add_command(notifications_cli)
+
+
+# Event Bus Commands
+##################################################################################
+events_cli = AppGroup('events', help='Cross-worker event bus commands')
+
+
+@events_cli.command("benchmark", help="Measure events per second for each event bus backend")
+@click.option("--backend", "backends", multiple=True, type=click.Choice(["local", "socket", "postgres"]),
+              help="Backend to measure (repeatable; default: every backend usable here)")
+@click.option("--events", default=20000, show_default=True, help="Events published per backend")
+@click.option("--batch-size", default=100, show_default=True, help="Events sent per NOTIFY / datagram")
+def events_benchmark_command(backends, events, batch_size):
+    is_postgres = db.engine.dialect.name == "postgresql"
+    if not backends:
+        backends = ["local", "socket"] + (["postgres"] if is_postgres else [])
+    for kind in backends:
+        if kind == "postgres" and not is_postgres:
+            print("postgres: skipped (the database is not Postgres)")
+            continue
+        bus = create_event_bus(
+            kind, engine=db.engine, batch_size=batch_size,
+            directory=os.path.join(tempfile.mkdtemp(), "bus")
+        )
+        result = bus_benchmark(bus, events=events)
+        print(f"{kind}: {result['events_per_second']} events/s "
+              f"({result['events']} events in {result['seconds']}s, "
+              f"{result['batches']} batches, {result['dropped']} dropped)")
+
+
+app.cli.add_command(events_cli)
+
 
 # Helper Commands
 ##################################################################################